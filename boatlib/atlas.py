@@ -0,0 +1,96 @@
+import os
+import sys
+import argparse
+
+from PIL import Image
+
+SPRITE_SIZE = 16
+
+
+class Atlas:
+    def __init__(self, name, columns=16, max_rows=256):
+        self.name = name
+        self.columns = columns
+        self.max_rows = max_rows
+        self.tiles = []
+        self.sprites = {}
+        self._tile_indices = {}
+
+    @property
+    def tiles_per_texture(self):
+        return self.columns * self.max_rows
+
+    def texture_name(self, texture):
+        if texture == 0:
+            return self.name
+        return f'{self.name}_{texture}'
+
+    def add(self, name, image):
+        if not isinstance(image, Image.Image):
+            image = Image.open(image)
+        image = image.convert('RGBA')
+        if image.size != (SPRITE_SIZE, SPRITE_SIZE):
+            raise ValueError(f'{name} is {image.size[0]}x{image.size[1]}, sprites must be {SPRITE_SIZE}x{SPRITE_SIZE}')
+
+        # Identical tiles only need to be stored once.
+        data = image.tobytes()
+        if data not in self._tile_indices:
+            self._tile_indices[data] = len(self.tiles)
+            self.tiles.append(image)
+        self.sprites[name] = self._tile_indices[data]
+        return self.sprite(name)
+
+    def add_sheet(self, prefix, image):
+        if not isinstance(image, Image.Image):
+            image = Image.open(image)
+        image = image.convert('RGBA')
+        columns = image.width // SPRITE_SIZE
+        for i in range(columns * (image.height // SPRITE_SIZE)):
+            x = (i % columns) * SPRITE_SIZE
+            y = (i // columns) * SPRITE_SIZE
+            tile = image.crop((x, y, x + SPRITE_SIZE, y + SPRITE_SIZE))
+            # Skip empty tiles
+            if tile.getbbox() is not None:
+                self.add(f'{prefix}{i}', tile)
+
+    def sprite(self, name):
+        texture, sprite = divmod(self.sprites[name], self.tiles_per_texture)
+        return {'texture': self.texture_name(texture), 'sprite': sprite}
+
+    def textures(self):
+        for start in range(0, len(self.tiles), self.tiles_per_texture):
+            tiles = self.tiles[start:start + self.tiles_per_texture]
+            rows = (len(tiles) + self.columns - 1) // self.columns
+            texture = Image.new('RGBA', (self.columns * SPRITE_SIZE, rows * SPRITE_SIZE))
+            for i, tile in enumerate(tiles):
+                texture.paste(tile, ((i % self.columns) * SPRITE_SIZE, (i // self.columns) * SPRITE_SIZE))
+            yield self.texture_name(start // self.tiles_per_texture), texture
+
+    def save(self, directory):
+        filenames = []
+        for name, texture in self.textures():
+            filename = os.path.join(directory, f'{name}.png')
+            texture.save(filename)
+            filenames.append(filename)
+        return filenames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack sprites into as few textures as possible.')
+    parser.add_argument('name', help='Texture name')
+    parser.add_argument('directory', help='Where to write the textures')
+    parser.add_argument('sprites', nargs='+', help=f'{SPRITE_SIZE}x{SPRITE_SIZE} sprite images')
+    parser.add_argument('--columns', type=int, default=16)
+    args = parser.parse_args()
+
+    atlas = Atlas(args.name, columns=args.columns)
+    for filename in args.sprites:
+        atlas.add(os.path.splitext(os.path.basename(filename))[0], filename)
+    for filename in atlas.save(args.directory):
+        print(f'Wrote {filename}', file=sys.stderr)
+    for name in atlas.sprites:
+        sprite = atlas.sprite(name)
+        print(f'{name}: texture={sprite["texture"]} sprite={sprite["sprite"]}')
+
+if __name__ == '__main__':
+    main()
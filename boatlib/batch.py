@@ -0,0 +1,129 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import concurrent.futures
+
+from . import export, waypoints
+from .map import Map
+
+MANIFEST = 'manifest.json'
+
+
+def find_maps(zone_dir):
+    # Every map image that has zone data next to it.
+    for image in sorted(glob.glob(os.path.join(zone_dir, '*.png'))):
+        zones = os.path.splitext(image)[0] + '.txt'
+        if os.path.exists(zones):
+            yield image, zones
+
+def input_hash(filenames, params):
+    h = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def process_map(image, zones, locations, directory, expansion, tolerance, record_type):
+    timings = {}
+    start = time.time()
+
+    def lap(stage):
+        nonlocal start
+        now = time.time()
+        timings[stage] = now - start
+        start = now
+
+    name = os.path.splitext(os.path.basename(image))[0]
+    m = Map(image, locations, zones)
+    lap('load')
+
+    layers = export.map_layers(m, expansion, tolerance)
+    lap('polygons')
+
+    outputs = export.save(layers, directory, name, m.img.width, m.img.height)
+    lap('export')
+
+    # Without existing waypoints or a record type, there's nothing to write them as.
+    if record_type is not None or next(m.get_waypoint_records(), None) is not None:
+        # Reuse the graph that was already built for the export.
+        lines = [tuple(map(tuple, line.tolist())) for line in layers['waypoints']]
+        records = waypoints.generate(m, expansion, tolerance, record_type, lines)
+        filename = os.path.join(directory, f'{name}_waypoints.txt')
+        with open(filename, 'w') as f:
+            f.write(records.serialize())
+        outputs.append(filename)
+    lap('waypoints')
+
+    return name, outputs, timings
+
+def run(zone_dir, locations, directory, expansion=4, tolerance=2, record_type=None, workers=None, force=False):
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    params = {'expansion': expansion, 'tolerance': tolerance, 'record_type': record_type}
+    jobs = {}
+    for image, zones in find_maps(zone_dir):
+        name = os.path.splitext(os.path.basename(image))[0]
+        inputs = input_hash([image, zones, locations], params)
+        previous = manifest.get(name)
+        if (not force and previous and previous['inputs'] == inputs
+                and all(os.path.exists(output) for output in previous['outputs'])):
+            continue
+        jobs[name] = (inputs, (image, zones, locations, directory, expansion, tolerance, record_type))
+
+    results = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_map, *args): (name, inputs) for name, (inputs, args) in jobs.items()}
+        for future in concurrent.futures.as_completed(futures):
+            name, inputs = futures[future]
+            _, outputs, timings = future.result()
+            manifest[name] = {'inputs': inputs, 'outputs': outputs, 'timings': timings}
+            results[name] = timings
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return results, manifest
+
+def report(results, manifest):
+    lines = []
+    stages = ['load', 'polygons', 'export', 'waypoints']
+    lines.append(' '.join([f'{"map":<20}'] + [f'{stage:>10}' for stage in stages] + [f'{"total":>10}']))
+    for name in sorted(manifest):
+        if name not in results:
+            lines.append(f'{name:<20} (unchanged)')
+            continue
+        timings = results[name]
+        cells = [f'{timings.get(stage, 0):>10.2f}' for stage in stages]
+        lines.append(' '.join([f'{name:<20}'] + cells + [f'{sum(timings.values()):>10.2f}']))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the coast and waypoint pipeline on every zone map.')
+    parser.add_argument('zone_dir', help='Directory with the ZoneData images and text files')
+    parser.add_argument('locations', help='defaultLocations.txt')
+    parser.add_argument('directory', help='Where to write the results')
+    parser.add_argument('--expansion', type=int, default=4)
+    parser.add_argument('--tolerance', type=int, default=2)
+    parser.add_argument('--record-type', help='Record type for maps without existing waypoints')
+    parser.add_argument('--workers', type=int, help='Number of processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='Process maps even if their inputs are unchanged')
+    args = parser.parse_args()
+
+    start = time.time()
+    results, manifest = run(args.zone_dir, args.locations, args.directory,
+                            args.expansion, args.tolerance, args.record_type,
+                            args.workers, args.force)
+    print(report(results, manifest), file=sys.stderr)
+    print(f'{len(results)} of {len(manifest)} maps processed in {time.time() - start:.2f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
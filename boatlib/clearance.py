@@ -0,0 +1,37 @@
+import numpy as np
+
+from .raster import coast_mask, lines_to_polygons, mask_lines
+
+
+class ClearanceField:
+    # Answers "how far from land is this?" by looking it up in a distance field,
+    # instead of re-running the coast pipeline for every clearance.
+    def __init__(self, distance):
+        self.distance = distance
+
+    def clearance(self, x, y):
+        # Works for single points or whole arrays of them.
+        h, w = self.distance.shape
+        xs = np.clip(np.rint(x).astype(int), 0, w - 1)
+        ys = np.clip(np.rint(y).astype(int), 0, h - 1)
+        return self.distance[ys, xs]
+
+    def is_safe(self, x, y, radius):
+        return self.clearance(x, y) >= radius
+
+    def segment_is_safe(self, p1, p2, radius):
+        (x1, y1), (x2, y2) = p1, p2
+        steps = max(1, int(np.ceil(np.hypot(x2 - x1, y2 - y1))))
+        t = np.linspace(0, 1, steps + 1)
+        return bool(np.all(self.is_safe(x1 + (x2 - x1) * t, y1 + (y2 - y1) * t, radius)))
+
+    def safe_mask(self, radius):
+        return np.asarray(self.distance) >= radius
+
+    def contour_mask(self, d):
+        # The safe pixels right next to unsafe ones.
+        return coast_mask(~self.safe_mask(d))
+
+    def contour(self, d):
+        # The outlines of everything closer than d to land, like Map.expand_islands(d).
+        return list(lines_to_polygons(mask_lines(self.contour_mask(d))))
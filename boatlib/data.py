@@ -1,21 +1,67 @@
 import re
-import uuid
+import fnmatch
 import contextlib
+import contextvars
 import collections
 
 FURNACE_IDS = ['furnace_lit', 'furnace2_lit', 'furnace_everlit1', 'furnace_everlit2']
 
-__NO_ID__ = object()
+# Records of these types are attached to a parent record with the same ID, rather
+# than defining something themselves.
+SUBRECORD_TYPES = {'itemreaction', 'itemlight', 'actionaoe', 'avaffecter', 'avaffecteraoe',
+                   'dialogoption', 'actortypereaction', 'globaltriggereffect'}
+
+# When a record patches an existing one, these fields are added to the existing list
+# instead of replacing it. Prefixing the field with '!' replaces the list.
+LIST_FIELDS = {'combineWith', 'toMake', 'consumeOnCombine'}
+
+class _NoId:
+    # Unpickles as the same object, so records made in another process still match it.
+    def __reduce__(self):
+        return '__NO_ID__'
+
+__NO_ID__ = _NoId()
 
 def generate_id(prefix):
+    # uuid is imported here since it's slow to import, and most scripts never need it.
+    import uuid
     return prefix + str(uuid.uuid4()).replace('-', '')
 
+# New records are added to the collection on top of this stack. It's a context variable
+# so that each thread has its own, and generators can run side by side.
+_collection_stack = contextvars.ContextVar('collection_stack', default=())
+
+def current_collection():
+    stack = _collection_stack.get()
+    return stack[-1] if stack else None
+
 @contextlib.contextmanager
 def collect_records():
     c = Collection()
     Serialize.push_collection(c)
-    yield c
-    Serialize.pop_collection()
+    try:
+        yield c
+    finally:
+        Serialize.pop_collection()
+
+def _collect(function):
+    def run():
+        with collect_records() as c:
+            function()
+        return c
+    return contextvars.Context().run(run)
+
+def generate_parallel(*functions, executor=None):
+    # Runs each generator with its own collection stack, by default in threads. The
+    # results are added to the current collection in the order given, however the work
+    # was scheduled, so the output is the same as calling them one after another.
+    # Functions given to a process pool need to be picklable.
+    if executor is None:
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor() as pool:
+            return generate_parallel(*functions, executor=pool)
+    futures = [executor.submit(_collect, function) for function in functions]
+    return Collection(*(future.result() for future in futures))
 
 class Duration:
     def __init__(self, *args, **kwargs):
@@ -68,20 +114,7 @@ class Parser:
                 if field:
                     key, value = field.split('=', 1)
                     key = key.strip()
-                    value = value.strip()
-
-                    if value.lower() == 'true':
-                        value = True
-                    elif value.lower() == 'false':
-                        value = False
-                    else:
-                        try:
-                            value = int(value)
-                        except ValueError:
-                            try:
-                                value = float(value)
-                            except ValueError:
-                                pass
+                    value = Parser.parse_value(value.strip())
 
                     if key not in record:
                         record[key] = value
@@ -92,9 +125,126 @@ class Parser:
             records.append(record)
         return records
 
-class Serialize:
-    _collection_stack = collections.deque([])
+    @staticmethod
+    def parse_value(value):
+        if value.lower() == 'true':
+            return True
+        elif value.lower() == 'false':
+            return False
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return value
+
+def load_records(*filenames):
+    records = []
+    for filename in filenames:
+        with open(filename) as f:
+            records.extend(Parser.parse(f.read()))
+    return records
+
+def format_record(record):
+    strings = [f'[{record["__type__"]}]']
+    for key, value in record.items():
+        if key == '__type__':
+            continue
+        if not isinstance(value, list):
+            value = [value]
+        for v in value:
+            if isinstance(v, bool):
+                v = str(v).lower()
+            strings.append(f'    {key}={v};')
+    return '\n'.join(strings)
+
+def recipes_by_result(records):
+    # What each item is made from, as pairs of the two items that are combined. A recipe
+    # can be given on either item, as its combineWith and toMake lists side by side.
+    recipes = collections.defaultdict(list)
+    for record in records:
+        if record['__type__'].lower() != 'itemtype' or 'ID' not in record:
+            continue
+        combine_withs = _list_field(record, 'combineWith')
+        to_makes = _list_field(record, 'toMake')
+        for other, result in zip(combine_withs, to_makes):
+            pair = tuple(sorted((record['ID'], other)))
+            if pair not in recipes[result]:
+                recipes[result].append(pair)
+    return recipes
+
+def _list_field(record, key):
+    values = record.get('!' + key, record.get(key, []))
+    if not isinstance(values, list):
+        values = [values]
+    # Replacement lists ('!toMake=a,b') are written as one comma separated value.
+    return [part.strip() for value in values for part in str(value).split(',') if part.strip()]
+
+def natural_key(text):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', text)]
+
+def group_records(records):
+    # A record and the subrecords that follow it with the same ID, like an ItemType and its
+    # ItemReactions, form a group. Order matters within a group, since each subrecord is
+    # attached to whatever came right before it. Subrecords without an ID, like most
+    # DialogOptions, belong to whatever came before them.
+    groups = []
+    for record in records:
+        if (groups
+                and record['__type__'].lower() in SUBRECORD_TYPES
+                and (record.get('ID') is None or record.get('ID') == groups[-1][0].get('ID'))
+                and record['__type__'].lower() != groups[-1][0]['__type__'].lower()):
+            groups[-1].append(record)
+        else:
+            groups.append([record])
+    return groups
+
+class Index:
+    # Records are keyed by (type, ID). Type names are compared case-insensitively,
+    # since the game data isn't consistent about it (AvAffecterAoE vs AvAffecterAOE).
+    def __init__(self, records=()):
+        self._records = collections.defaultdict(list)
+        for record in records:
+            self.add(record)
+
+    @staticmethod
+    def key(record_type, record_id):
+        return (record_type.lower(), record_id)
+
+    def add(self, record):
+        self._records[self.key(record['__type__'], record.get('ID'))].append(record)
 
+    def get(self, record_type, record_id, default=None):
+        records = self._records.get(self.key(record_type, record_id))
+        if not records:
+            return default
+        return records[0]
+
+    def get_all(self, record_type, record_id):
+        return self._records.get(self.key(record_type, record_id), [])
+
+    def __contains__(self, key):
+        return self.key(*key) in self._records
+
+    def ids(self, record_type):
+        record_type = record_type.lower()
+        return [record_id for key_type, record_id in self._records if key_type == record_type]
+
+    def select(self, record_type, pattern):
+        # IDs of the given type matching a glob pattern like 'port*_dojo4', in natural
+        # order so port7 comes before port12.
+        ids = {record_id for record_id in self.ids(record_type)
+               if record_id is not None and fnmatch.fnmatchcase(record_id, pattern)}
+        return sorted(ids, key=natural_key)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+class Serialize:
     def __init__(self, id, properties, subtypes=None):
         self.id = id
         self.properties = properties
@@ -103,16 +253,23 @@ class Serialize:
             subtypes = []
         self.subtypes = subtypes
 
-        if len(self._collection_stack) and id is not None and id is not __NO_ID__:
-            self._collection_stack[-1].append(self)
+        collection = current_collection()
+        if collection is not None and id is not None and id is not __NO_ID__:
+            collection.append(self)
 
     @classmethod
     def push_collection(cls, c):
-        cls._collection_stack.append(c)
+        _collection_stack.set(_collection_stack.get() + (c,))
 
     @classmethod
     def pop_collection(cls):
-        return cls._collection_stack.pop()
+        stack = _collection_stack.get()
+        _collection_stack.set(stack[:-1])
+        return stack[-1]
+
+    @property
+    def record_type(self):
+        return self.__class__.__name__
 
     def serialize(self):
         return self._serialize(self)
@@ -128,7 +285,7 @@ class Serialize:
             return str(value)
 
     def _serialize(self, owner):
-        strings = [f'[{self.__class__.__name__}]']
+        strings = [f'[{self.record_type}]']
         if self.id is not __NO_ID__:
             strings.append(f'    ID={owner.id};')
         for key, value in self.properties.items():
@@ -152,8 +309,9 @@ class Collection:
     def __init__(self, *items):
         self.items = list(items)
 
-        if len(Serialize._collection_stack):
-            Serialize._collection_stack[-1].append(self)
+        collection = current_collection()
+        if collection is not None:
+            collection.append(self)
 
     def serialize(self):
         return '\n\n'.join(i.serialize() for i in self.items)
@@ -161,12 +319,20 @@ class Collection:
     def append(self, item):
         self.items.append(item)
 
+    def walk(self):
+        for item in self.items:
+            if isinstance(item, Collection):
+                yield from item.walk()
+            else:
+                yield item
+
 class Comment:
     def __init__(self, text):
         self.text = text
 
-        if len(Serialize._collection_stack):
-            Serialize._collection_stack[-1].append(self)
+        collection = current_collection()
+        if collection is not None:
+            collection.append(self)
 
     def serialize(self):
         return '\n'.join([f'-- {line.strip()}' for line in self.text.split('\n')])
@@ -236,7 +402,7 @@ class GlobalTriggerEffect(Serialize):
                 properties['fValue2'] = floats[1]
         if bools:
             if len(bools) > 0:
-                properties['bValue1'] = bools[0]
+                properties['bValue'] = bools[0]
             if len(bools) > 1:
                 properties['bValue2'] = bools[1]
 
@@ -333,6 +499,17 @@ class DialogOption(Serialize):
         option_id = kwargs.pop('ID', __NO_ID__)
         super().__init__(option_id, kwargs)
 
+def attach_options(node_ids, options):
+    # Adds options to many dialog nodes at once. Each option is (pattern, text, node,
+    # kwargs), and goes on every node whose ID matches the pattern. A node's options are
+    # all emitted together, in the order given.
+    added = []
+    for node_id in dict.fromkeys(node_ids):
+        for pattern, text, node, kwargs in options:
+            if fnmatch.fnmatchcase(node_id, pattern):
+                added.append(DialogOption(text, node, ID=node_id, **kwargs))
+    return added
+
 class ActorPrefab(Serialize):
     # I think there's more to this, but it's all I need for now.
     def __init__(self, prefab_id, **kwargs):
@@ -353,6 +530,17 @@ class ActorTypeDetectAoE(Serialize):
     def __init__(self, actor_id, **kwargs):
         super().__init__(actor_id, kwargs)
 
+class ZoneRecord(Serialize):
+    # Zone files have their own record types, so the type is given instead of
+    # coming from the class name.
+    def __init__(self, record_type, record_id, **kwargs):
+        self._record_type = record_type
+        super().__init__(record_id, kwargs)
+
+    @property
+    def record_type(self):
+        return self._record_type
+
 class FormulaGlobal(Serialize):
     def __init__(self, formula_id, formula):
         super().__init__(formula_id, {'formula': formula})
@@ -0,0 +1,161 @@
+import sys
+import copy
+import argparse
+import importlib
+import itertools
+import collections
+
+from .data import Collection, Index, Parser, Serialize, load_records
+
+
+def normalize(record, value):
+    if not isinstance(value, list):
+        value = [value]
+    return [Parser.parse_value(record._str(v)) for v in value if v is not None]
+
+def base_values(value):
+    if not isinstance(value, list):
+        return [value]
+    return value
+
+RECIPE_FIELDS = ('combineWith', 'toMake', 'consumeOnCombine')
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def new_recipes(record, base):
+    # combineWith, toMake and consumeOnCombine are read side by side, one recipe per
+    # position, so they're compared as whole recipes. Returns the recipe fields holding
+    # only the recipes the base doesn't already have.
+    values = [_as_list(record.properties.get(key)) for key in RECIPE_FIELDS]
+    base_recipes = list(itertools.zip_longest(*(base_values(base.get(key, [])) for key in RECIPE_FIELDS)))
+    # A recipe without a consumeOnCombine doesn't consume the other item.
+    base_recipes = [(a, b, False if consume is None else consume) for a, b, consume in base_recipes]
+    added = []
+    for raw in itertools.zip_longest(*values):
+        a, b, consume = (normalize(record, v)[0] if v is not None else None for v in raw)
+        if (a, b, False if consume is None else consume) not in base_recipes:
+            added.append(raw)
+    overrides = {}
+    for i, key in enumerate(RECIPE_FIELDS):
+        if record.properties.get(key) is not None and added:
+            overrides[key] = [raw[i] for raw in added if raw[i] is not None]
+    return overrides
+
+class RecordDiff(collections.namedtuple('RecordDiff', ['record', 'base', 'overrides'])):
+
+    @property
+    def is_new(self):
+        return self.base is None
+
+    @property
+    def is_redefinition(self):
+        # Without cloneFrom, a record replaces the base record rather than patching it.
+        return self.base is not None and self.record.properties.get('cloneFrom') is None
+
+    @property
+    def is_noop(self):
+        # A record that only points back at an unchanged base record doesn't do anything.
+        # Records with subtypes always do something, since subtypes are appended to the base.
+        if self.base is None or self.overrides or self.record.subtypes:
+            return False
+        return self.record.properties.get('cloneFrom', self.record.id) == self.record.id
+
+def diff_record(record, base_index):
+    clone_from = record.properties.get('cloneFrom')
+    if clone_from is None:
+        # Without cloneFrom, the record fully defines itself. It's only redundant
+        # if the exact same record already exists.
+        fields = {key for key, value in record.properties.items() if value is not None}
+        for base in base_index.get_all(record.record_type, record.id):
+            if (fields == set(base) - {'__type__', 'ID'}
+                    and all(normalize(record, record.properties[key]) == base_values(base[key])
+                            for key in fields)):
+                return RecordDiff(record, base, {})
+        bases = base_index.get_all(record.record_type, record.id)
+        return RecordDiff(record, bases[0] if bases else None, dict(record.properties))
+
+    base = base_index.get(record.record_type, record._str(clone_from))
+    if base is None:
+        return RecordDiff(record, None, dict(record.properties))
+
+    overrides = {}
+    for key, value in record.properties.items():
+        if key == 'cloneFrom' or value is None:
+            continue
+        # The '!' fields replace whole lists, so there's nothing meaningful to compare against.
+        if key.startswith('!'):
+            overrides[key] = value
+        elif key in RECIPE_FIELDS:
+            continue
+        elif normalize(record, value) != base_values(base.get(key)):
+            overrides[key] = value
+    overrides.update(new_recipes(record, base))
+    return RecordDiff(record, base, overrides)
+
+def diff_collection(collection, base_index):
+    return [diff_record(item, base_index)
+            for item in collection.walk()
+            if isinstance(item, Serialize)]
+
+def minimize(collection, base_index):
+    minimized = Collection()
+    for item in collection.walk():
+        if not isinstance(item, Serialize):
+            minimized.append(item)
+            continue
+
+        diff = diff_record(item, base_index)
+        if diff.is_noop:
+            continue
+        if diff.is_new:
+            minimized.append(item)
+            continue
+
+        record = copy.copy(item)
+        record.properties = {key: diff.overrides.get(key, value) for key, value in item.properties.items()
+                             if key == 'cloneFrom' or key in diff.overrides}
+        minimized.append(record)
+    return minimized
+
+def report(diffs):
+    lines = []
+    counts = collections.Counter()
+    for diff in diffs:
+        name = f'{diff.record.record_type} {diff.record.id}'
+        if diff.is_noop:
+            counts['no-op'] += 1
+            lines.append(f'{name}: no-op')
+        elif diff.is_new:
+            counts['new'] += 1
+        elif diff.is_redefinition:
+            counts['redefined'] += 1
+            lines.append(f'{name}: redefined')
+        else:
+            counts['changed'] += 1
+            fields = len([v for v in diff.record.properties.values() if v is not None])
+            lines.append(f'{name}: {len(diff.overrides)} of {fields} fields overridden')
+    lines.append(f'{counts["new"]} new, {counts["changed"]} changed, {counts["redefined"]} redefined, '
+                 f'{counts["no-op"]} no-op')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare generated records against the base game data.')
+    parser.add_argument('generator', help='A function returning a Collection, such as farm_mod.plants:define_plants')
+    parser.add_argument('base', nargs='+', help='Base game data files')
+    parser.add_argument('--report', action='store_true', help='Only print the report')
+    args = parser.parse_args()
+
+    module_name, function_name = args.generator.split(':')
+    collection = getattr(importlib.import_module(module_name), function_name)()
+    base_index = Index(load_records(*args.base))
+
+    print(report(diff_collection(collection, base_index)), file=sys.stderr)
+    if not args.report:
+        print(minimize(collection, base_index).serialize())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+
+import numpy as np
+
+from .map import Map
+from .nav import NavGraph
+
+POLYGONS = 0
+LINES = 1
+
+MAGIC = b'BLVF'
+VERSION = 1
+
+
+class Layer:
+    # A set of polygons or lines stored as one flat array of points, plus the offset
+    # where each shape starts. Loaded layers are views straight into the file.
+    def __init__(self, kind, offsets, points):
+        self.kind = kind
+        self.offsets = offsets
+        self.points = points
+
+    @classmethod
+    def from_shapes(cls, kind, shapes):
+        shapes = [np.asarray(shape, dtype='<f4').reshape(-1, 2) for shape in shapes]
+        offsets = np.zeros(len(shapes) + 1, dtype='<u4')
+        offsets[1:] = np.cumsum([len(shape) for shape in shapes])
+        if shapes:
+            points = np.concatenate(shapes)
+        else:
+            points = np.zeros((0, 2), dtype='<f4')
+        return cls(kind, offsets, points)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.points[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def map_layers(m, expansion=4, tolerance=2):
+    islands, _ = m.simplified_islands(expansion, tolerance)
+    return {
+        'coast': Layer.from_shapes(POLYGONS, m.get_coast_polygons()),
+        'islands': Layer.from_shapes(POLYGONS, islands),
+        'waypoints': Layer.from_shapes(LINES, NavGraph(islands).lines()),
+    }
+
+def to_geojson(layers):
+    features = []
+    for name, layer in layers.items():
+        for shape in layer:
+            coordinates = shape.tolist()
+            if layer.kind == POLYGONS:
+                geometry = {'type': 'Polygon', 'coordinates': [coordinates + coordinates[:1]]}
+            else:
+                geometry = {'type': 'LineString', 'coordinates': coordinates}
+            features.append({'type': 'Feature', 'properties': {'layer': name}, 'geometry': geometry})
+    return json.dumps({'type': 'FeatureCollection', 'features': features})
+
+def load_geojson(data):
+    shapes = {}
+    kinds = {}
+    for feature in json.loads(data)['features']:
+        name = feature['properties']['layer']
+        geometry = feature['geometry']
+        if geometry['type'] == 'Polygon':
+            kinds[name] = POLYGONS
+            shapes.setdefault(name, []).append(geometry['coordinates'][0][:-1])
+        else:
+            kinds[name] = LINES
+            shapes.setdefault(name, []).append(geometry['coordinates'])
+    return {name: Layer.from_shapes(kinds[name], shapes[name]) for name in shapes}
+
+def to_svg(layers, width, height, colors=None):
+    if colors is None:
+        colors = {}
+    strings = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">']
+    for name, layer in layers.items():
+        color = colors.get(name, 'red')
+        strings.append(f'<g id="{name}" fill="none" stroke="{color}" stroke-width="1">')
+        for shape in layer:
+            points = ' '.join(f'{x:g},{y:g}' for x, y in shape.tolist())
+            tag = 'polygon' if layer.kind == POLYGONS else 'polyline'
+            strings.append(f'<{tag} points="{points}"/>')
+        strings.append('</g>')
+    strings.append('</svg>')
+    return '\n'.join(strings)
+
+def _pad(length):
+    return (-length) % 4
+
+def to_binary(layers):
+    # MAGIC, version, layer count, then for each layer: name, kind, shape count, point
+    # count, the offsets and the points. Everything is little endian and arrays are
+    # 4 byte aligned so they can be mapped straight into NumPy.
+    chunks = [MAGIC, struct.pack('<II', VERSION, len(layers))]
+    for name, layer in layers.items():
+        encoded = name.encode()
+        header = struct.pack('<H', len(encoded)) + encoded
+        header += b'\0' * _pad(len(header))
+        chunks.append(header)
+        chunks.append(struct.pack('<III', layer.kind, len(layer), len(layer.points)))
+        chunks.append(np.ascontiguousarray(layer.offsets, dtype='<u4').tobytes())
+        chunks.append(np.ascontiguousarray(layer.points, dtype='<f4').tobytes())
+    return b''.join(chunks)
+
+def load_binary(buffer):
+    if buffer[:4] != MAGIC:
+        raise ValueError('not a boatlib vector file')
+    version, count = struct.unpack_from('<II', buffer, 4)
+    if version != VERSION:
+        raise ValueError(f'unsupported version {version}')
+
+    offset = 12
+    layers = {}
+    for _ in range(count):
+        length, = struct.unpack_from('<H', buffer, offset)
+        name = bytes(buffer[offset + 2:offset + 2 + length]).decode()
+        offset += 2 + length
+        offset += _pad(offset)
+        kind, shapes, points = struct.unpack_from('<III', buffer, offset)
+        offset += 12
+        offsets = np.frombuffer(buffer, dtype='<u4', count=shapes + 1, offset=offset)
+        offset += offsets.nbytes
+        coords = np.frombuffer(buffer, dtype='<f4', count=points * 2, offset=offset).reshape(-1, 2)
+        offset += coords.nbytes
+        layers[name] = Layer(kind, offsets, coords)
+    return layers
+
+def load_binary_file(filename):
+    with open(filename, 'rb') as f:
+        return load_binary(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def save(layers, directory, name, width, height):
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, name)
+    with open(base + '.geojson', 'w') as f:
+        f.write(to_geojson(layers))
+    with open(base + '.svg', 'w') as f:
+        f.write(to_svg(layers, width, height))
+    with open(base + '.blv', 'wb') as f:
+        f.write(to_binary(layers))
+    return [base + '.geojson', base + '.svg', base + '.blv']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export coasts, islands and waypoints as vector data.')
+    parser.add_argument('image')
+    parser.add_argument('locations')
+    parser.add_argument('zones')
+    parser.add_argument('directory')
+    parser.add_argument('--expansion', type=int, default=4)
+    parser.add_argument('--tolerance', type=int, default=2)
+    args = parser.parse_args()
+
+    m = Map(args.image, args.locations, args.zones)
+    layers = map_layers(m, args.expansion, args.tolerance)
+    name = os.path.splitext(os.path.basename(args.image))[0]
+    for filename in save(layers, args.directory, name, m.img.width, m.img.height):
+        print(f'Wrote {filename}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
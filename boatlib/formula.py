@@ -0,0 +1,211 @@
+import re
+import sys
+import random
+import argparse
+import functools
+
+from .data import FormulaGlobal
+
+TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<number>\d+\.?\d*|\.\d+)
+      | (?P<variable>[A-Za-z_]\w*:[A-Za-z_][\w.]*(?:\(\s*\d+\s*\))?)
+      | (?P<op>[-+*/()])
+    )''', re.VERBOSE)
+
+GLOBAL_IS = re.compile(r'gIs(\d+)$')
+GLOBAL_AT_LEAST = re.compile(r'g(\d+)$')
+RAND = re.compile(r'rand\(\s*(\d+)\s*\)$')
+
+
+class Environment:
+    # Where formulas get their values from. Anything that isn't set is 0, like an unset
+    # global var in the game. Values can be NumPy arrays, to evaluate a formula for many
+    # games at once.
+    def __init__(self, globals=None, party_items=None, zone_items=None, money=0,
+                 formulas=None, rng=None, size=None):
+        self.globals = globals if globals is not None else {}
+        self.party_items = party_items if party_items is not None else {}
+        self.zone_items = zone_items if zone_items is not None else {}
+        self.money = money
+        self.formulas = formulas if formulas is not None else {}
+        self.rng = rng
+        self.size = size
+
+    def rand(self, n):
+        # A whole number from 0 up to n - 1.
+        if self.rng is None:
+            return random.randrange(n)
+        return self.rng.integers(n, size=self.size)
+
+    def formula(self, name):
+        return compile_formula(self.formulas[name])(self)
+
+
+def formulas_from(records):
+    # FormulaGlobal records, either generated or parsed from game data.
+    formulas = {}
+    for record in records:
+        if isinstance(record, FormulaGlobal):
+            formulas[record.id] = record.properties['formula']
+        elif isinstance(record, dict) and record.get('__type__') == 'FormulaGlobal':
+            formulas[record['ID']] = record['formula']
+    return formulas
+
+
+def _global(name):
+    return lambda env: env.globals.get(name, 0)
+
+def _variable(token):
+    prefix, name = token.split(':', 1)
+    if prefix == 'g':
+        return _global(name)
+    match = GLOBAL_IS.match(prefix)
+    if match:
+        value = int(match.group(1))
+        get = _global(name)
+        return lambda env: (get(env) == value) * 1
+    match = GLOBAL_AT_LEAST.match(prefix)
+    if match:
+        value = int(match.group(1))
+        get = _global(name)
+        return lambda env: (get(env) >= value) * 1
+    if prefix == 'partyItem':
+        return lambda env: env.party_items.get(name, 0)
+    if prefix == 'itemsZone':
+        return lambda env: env.zone_items.get(name, 0)
+    if prefix == 'd':
+        return lambda env: env.formula(name)
+    if prefix == 'm':
+        if name == 'money':
+            return lambda env: env.money
+        match = RAND.match(name)
+        if match:
+            n = int(match.group(1))
+            return lambda env: env.rand(n)
+    raise ValueError(f'unknown formula variable: {token}')
+
+def _scan(text):
+    # Each token as (kind, value, position in the text).
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f'bad formula at {position}: {text!r}')
+        yield match.lastgroup, match.group(match.lastgroup), match.start(match.lastgroup)
+        position = match.end()
+
+def tokenize(text):
+    return [(kind, value) for kind, value, _ in _scan(text)]
+
+
+class _Parser:
+    # Recursive descent over + - * / with the usual precedence. Each rule returns a
+    # closure taking the Environment, so the text is only looked at once.
+    def __init__(self, text):
+        self.text = text
+        scanned = list(_scan(text))
+        self.tokens = [(kind, value) for kind, value, _ in scanned]
+        self.offsets = [offset for _, _, offset in scanned] + [len(text.rstrip())]
+        self.position = 0
+
+    def error(self, message):
+        offset = self.offsets[min(self.position, len(self.tokens))]
+        return ValueError(f'formula {self.text!r}, position {offset}: {message}')
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        result = self.expression()
+        if self.peek()[0] is not None:
+            raise self.error(f'unexpected {self.peek()[1]!r}')
+        return result
+
+    def expression(self):
+        left = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            _, op = self.take()
+            right = self.term()
+            if op == '+':
+                left = (lambda a, b: lambda env: a(env) + b(env))(left, right)
+            else:
+                left = (lambda a, b: lambda env: a(env) - b(env))(left, right)
+        return left
+
+    def term(self):
+        left = self.factor()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            _, op = self.take()
+            right = self.factor()
+            if op == '*':
+                left = (lambda a, b: lambda env: a(env) * b(env))(left, right)
+            else:
+                left = (lambda a, b: lambda env: a(env) / b(env))(left, right)
+        return left
+
+    def factor(self):
+        kind, value = self.peek()
+        if kind is None:
+            raise self.error('unexpected end of formula, expected a value')
+        self.take()
+        if kind == 'number':
+            number = float(value) if '.' in value else int(value)
+            return lambda env: number
+        if kind == 'variable':
+            return _variable(value)
+        if (kind, value) == ('op', '-'):
+            operand = self.factor()
+            return lambda env: -operand(env)
+        if (kind, value) == ('op', '('):
+            inner = self.expression()
+            if self.peek() != ('op', ')'):
+                raise self.error('missing )')
+            self.take()
+            return inner
+        self.position -= 1
+        raise self.error(f'unexpected {value!r}')
+
+
+@functools.lru_cache(maxsize=None)
+def compile_formula(text):
+    return _Parser(text).parse()
+
+def evaluate(text, env=None):
+    return compile_formula(text)(env if env is not None else Environment())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a game formula.')
+    parser.add_argument('formula')
+    parser.add_argument('--set', action='append', default=[], metavar='PREFIX:NAME=VALUE',
+                        help='Set a value, such as g:crop_harvest_ambush=0 or partyItem:turnip=3')
+    parser.add_argument('--formulas', nargs='*', default=[], help='Files with FormulaGlobal records for d: formulas')
+    args = parser.parse_args()
+
+    from .data import load_records
+
+    env = Environment(formulas=formulas_from(load_records(*args.formulas)) if args.formulas else {})
+    targets = {'g': env.globals, 'partyItem': env.party_items, 'itemsZone': env.zone_items}
+    for setting in args.set:
+        key, value = setting.split('=', 1)
+        prefix, name = key.split(':', 1)
+        if prefix == 'm' and name == 'money':
+            env.money = float(value)
+        elif prefix in targets:
+            targets[prefix][name] = float(value)
+        else:
+            print(f'Cannot set {key}', file=sys.stderr)
+            sys.exit(1)
+    print(evaluate(args.formula, env))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import math
+import collections
+
+
+def cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+def distance(p1, p2):
+    return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+
+def segments_cross(p1, p2, q1, q2):
+    # True if the segments cross at a point that isn't an end point of either of them.
+    # Segments that only touch aren't considered to be crossing.
+    d1 = cross(q1, q2, p1)
+    d2 = cross(q1, q2, p2)
+    d3 = cross(p1, p2, q1)
+    d4 = cross(p1, p2, q2)
+    return ((d1 > 0 and d2 < 0) or (d1 < 0 and d2 > 0)) and ((d3 > 0 and d4 < 0) or (d3 < 0 and d4 > 0))
+
+def point_in_polygon(point, polygon):
+    x, y = point
+    inside = False
+    for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (y1 > y) != (y2 > y):
+            if x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+def signed_area(polygon):
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1])) / 2
+
+def convex_vertices(polygon):
+    # Shortest paths around polygons only ever bend at convex corners.
+    area = signed_area(polygon)
+    for prev, point, following in zip(polygon[-1:] + polygon[:-1], polygon, polygon[1:] + polygon[:1]):
+        turn = cross(prev, point, following)
+        if turn != 0 and (turn > 0) == (area > 0):
+            yield point
+
+def bounding_box(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+class GridIndex:
+    # A uniform grid over bounding boxes. It's much simpler than an R-tree, and works
+    # well when the items are spread over the map and roughly the same size.
+    def __init__(self, cell_size=32):
+        self.cell_size = cell_size
+        self.cells = collections.defaultdict(list)
+        self.items = []
+
+    def cell(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, item, bbox):
+        index = len(self.items)
+        self.items.append((item, bbox))
+        x1, y1 = self.cell(bbox[0], bbox[1])
+        x2, y2 = self.cell(bbox[2], bbox[3])
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                self.cells[(cx, cy)].append(index)
+        return index
+
+    def _collect(self, cells):
+        seen = set()
+        for cell in cells:
+            for index in self.cells.get(cell, ()):
+                if index not in seen:
+                    seen.add(index)
+                    yield self.items[index][0]
+
+    def query_point(self, point):
+        return self._collect([self.cell(*point)])
+
+    def query_rect(self, bbox):
+        x1, y1 = self.cell(bbox[0], bbox[1])
+        x2, y2 = self.cell(bbox[2], bbox[3])
+        return self._collect((cx, cy) for cx in range(x1, x2 + 1) for cy in range(y1, y2 + 1))
+
+    def query_segment(self, p1, p2):
+        return self._collect(self.segment_cells(p1, p2))
+
+    def segment_cells(self, p1, p2):
+        # Walk through the grid columns the segment crosses, and take the range of rows it
+        # covers in each. This only visits cells that the segment actually passes through.
+        (x1, y1), (x2, y2) = sorted((p1, p2))
+        cx1, _ = self.cell(x1, y1)
+        cx2, _ = self.cell(x2, y2)
+        for cx in range(cx1, cx2 + 1):
+            left = max(x1, cx * self.cell_size)
+            right = min(x2, (cx + 1) * self.cell_size)
+            if x1 == x2:
+                ya, yb = y1, y2
+            else:
+                ya = y1 + (y2 - y1) * (left - x1) / (x2 - x1)
+                yb = y1 + (y2 - y1) * (right - x1) / (x2 - x1)
+            _, cy1 = self.cell(left, min(ya, yb))
+            _, cy2 = self.cell(left, max(ya, yb))
+            for cy in range(cy1, cy2 + 1):
+                yield (cx, cy)
+
+def segment_position(p1, p2, point):
+    # How far along the segment the point's projection is, from 0 at p1 to 1 at p2.
+    dx = p2[0] - p1[0]
+    dy = p2[1] - p1[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return 0.0
+    return ((point[0] - p1[0]) * dx + (point[1] - p1[1]) * dy) / length_sq
+
+def point_segment_distance(point, p1, p2):
+    dx = p2[0] - p1[0]
+    dy = p2[1] - p1[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return distance(point, p1)
+    t = ((point[0] - p1[0]) * dx + (point[1] - p1[1]) * dy) / length_sq
+    t = max(0, min(1, t))
+    return distance(point, (p1[0] + t * dx, p1[1] + t * dy))
+
+def simplify_line(points, tolerance):
+    # Douglas-Peucker. Returns the kept points and the largest distance between a removed
+    # point and the simplified line.
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    max_error = 0
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest = None
+        farthest_distance = 0
+        for i in range(first + 1, last):
+            d = point_segment_distance(points[i], points[first], points[last])
+            if d > farthest_distance:
+                farthest, farthest_distance = i, d
+        if farthest is not None and farthest_distance > tolerance:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+        else:
+            max_error = max(max_error, farthest_distance)
+    return [p for p, k in zip(points, keep) if k], max_error
+
+def simplify_polygon(polygon, tolerance):
+    if len(polygon) <= 4:
+        return list(polygon), 0
+    # Split the ring at the point farthest from the start, and simplify both halves.
+    split = max(range(len(polygon)), key=lambda i: distance(polygon[0], polygon[i]))
+    first, error1 = simplify_line(polygon[:split + 1], tolerance)
+    second, error2 = simplify_line(polygon[split:] + polygon[:1], tolerance)
+    return first[:-1] + second[:-1], max(error1, error2)
@@ -0,0 +1,187 @@
+import sys
+import argparse
+
+from .geometry import (GridIndex, bounding_box, distance, point_in_polygon,
+                       point_segment_distance, segments_cross)
+
+POINT = 'point'
+RECT = 'rect'
+POLYGON = 'polygon'
+
+
+def record_shape(record):
+    # Zones cover a rectangle, locations are a single point.
+    if all(key in record for key in ('topX', 'topY', 'btmX', 'btmY')):
+        x1, x2 = sorted((record['topX'], record['btmX']))
+        y1, y2 = sorted((record['topY'], record['btmY']))
+        return RECT, (x1, y1, x2, y2)
+    if 'x' in record and 'y' in record:
+        return POINT, (record['x'], record['y'])
+    return None
+
+def shape_bbox(kind, geometry):
+    if kind == POINT:
+        return geometry + geometry
+    if kind == RECT:
+        return geometry
+    return bounding_box(geometry)
+
+def _edges(polygon):
+    return zip(polygon, polygon[1:] + polygon[:1])
+
+def _rect_polygon(bbox):
+    x1, y1, x2, y2 = bbox
+    return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+
+def _in_rect(point, bbox):
+    return bbox[0] <= point[0] <= bbox[2] and bbox[1] <= point[1] <= bbox[3]
+
+def shape_distance(kind, geometry, point):
+    if kind == POINT:
+        return distance(point, geometry)
+    if kind == RECT:
+        x1, y1, x2, y2 = geometry
+        dx = max(x1 - point[0], 0, point[0] - x2)
+        dy = max(y1 - point[1], 0, point[1] - y2)
+        return (dx * dx + dy * dy) ** 0.5
+    if point_in_polygon(point, geometry):
+        return 0
+    return min(point_segment_distance(point, p1, p2) for p1, p2 in _edges(geometry))
+
+def shape_intersects_rect(kind, geometry, bbox):
+    if kind == POINT:
+        return _in_rect(geometry, bbox)
+    if kind == RECT:
+        return geometry[0] <= bbox[2] and bbox[0] <= geometry[2] and geometry[1] <= bbox[3] and bbox[1] <= geometry[3]
+    if any(_in_rect(p, bbox) for p in geometry):
+        return True
+    rect = _rect_polygon(bbox)
+    if point_in_polygon(rect[0], geometry):
+        return True
+    return any(segments_cross(p1, p2, q1, q2) for p1, p2 in _edges(geometry) for q1, q2 in _edges(rect))
+
+
+class RecordIndex:
+    # Finds the location and zone records under a point or inside an area.
+    def __init__(self, cell_size=32):
+        self.grid = GridIndex(cell_size)
+        self.shapes = []
+        self.extent = None
+
+    def add(self, record, kind=None, geometry=None):
+        if kind is None:
+            shape = record_shape(record)
+            if shape is None:
+                return None
+            kind, geometry = shape
+        bbox = shape_bbox(kind, geometry)
+        if self.extent is None:
+            self.extent = bbox
+        else:
+            self.extent = (min(self.extent[0], bbox[0]), min(self.extent[1], bbox[1]),
+                           max(self.extent[2], bbox[2]), max(self.extent[3], bbox[3]))
+        index = len(self.shapes)
+        self.shapes.append((record, kind, geometry))
+        self.grid.insert(index, bbox)
+        return index
+
+    def add_polygon(self, record, polygon):
+        return self.add(record, POLYGON, [tuple(p) for p in polygon])
+
+    def add_records(self, records):
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def query_point(self, point, radius=0):
+        # Points never cover anything by themselves, so they're hit within the radius.
+        if radius:
+            x, y = point
+            candidates = self.grid.query_rect((x - radius, y - radius, x + radius, y + radius))
+        else:
+            candidates = self.grid.query_point(point)
+        for index in candidates:
+            record, kind, geometry = self.shapes[index]
+            if shape_distance(kind, geometry, point) <= radius:
+                yield record
+
+    def query_rect(self, bbox):
+        for index in self.grid.query_rect(bbox):
+            record, kind, geometry = self.shapes[index]
+            if shape_intersects_rect(kind, geometry, bbox):
+                yield record
+
+    def query_segment(self, p1, p2, radius=0):
+        x1, y1, x2, y2 = bounding_box((p1, p2))
+        for index in self.grid.query_rect((x1 - radius, y1 - radius, x2 + radius, y2 + radius)):
+            record, kind, geometry = self.shapes[index]
+            if kind == POINT:
+                hit = point_segment_distance(geometry, p1, p2) <= radius
+            else:
+                # Close enough for checking lines against zones.
+                hit = min(shape_distance(kind, geometry, p) for p in (p1, p2, ((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2))) <= radius
+                if not hit:
+                    polygon = _rect_polygon(geometry) if kind == RECT else geometry
+                    hit = any(segments_cross(p1, p2, q1, q2) for q1, q2 in _edges(polygon))
+            if hit:
+                yield record
+
+    def nearest(self, point, k=1):
+        # Search a growing square around the point until it's known to contain the k
+        # nearest shapes.
+        if not self.shapes:
+            return []
+        x, y = point
+        left, top, right, bottom = self.extent
+        reach = max(abs(x - left), abs(x - right), abs(y - top), abs(y - bottom))
+        # Nothing is closer than the edge of the extent, so there's no point starting with
+        # a smaller square. The square is also clipped to the extent, so a point far
+        # outside it doesn't mean visiting lots of empty cells.
+        outside = max(left - x, x - right, top - y, y - bottom, 0)
+        radius = max(self.grid.cell_size, outside)
+        while True:
+            found = []
+            rect = (max(x - radius, left), max(y - radius, top),
+                    min(x + radius, right), min(y + radius, bottom))
+            for index in self.grid.query_rect(rect):
+                _, kind, geometry = self.shapes[index]
+                found.append((shape_distance(kind, geometry, point), index))
+            found.sort()
+            # Anything outside the square is further away than its half width.
+            close = [item for item in found if item[0] <= radius]
+            if len(close) >= k or radius >= reach:
+                return [(self.shapes[index][0], d) for d, index in found[:k]]
+            radius *= 2
+
+
+def map_index(m, cell_size=32):
+    index = RecordIndex(cell_size)
+    index.add_records(m.location_data)
+    index.add_records(m.zone_data)
+    return index
+
+
+def main():
+    from .map import Map
+
+    parser = argparse.ArgumentParser(description='Find the location and zone records at a point.')
+    parser.add_argument('image')
+    parser.add_argument('locations')
+    parser.add_argument('zones')
+    parser.add_argument('x', type=float)
+    parser.add_argument('y', type=float)
+    parser.add_argument('--nearest', type=int, default=0, help='Also list the N nearest records')
+    args = parser.parse_args()
+
+    m = Map(args.image, args.locations, args.zones)
+    index = m.record_index()
+    for record in index.query_point((args.x, args.y)):
+        print(f'{record["__type__"]} {record.get("ID")}')
+    if args.nearest:
+        for record, d in index.nearest((args.x, args.y), args.nearest):
+            print(f'{d:8.1f} {record["__type__"]} {record.get("ID")}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
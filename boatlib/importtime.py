@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# Time allowed for a whole `python -m dummy` run, interpreter start up included.
+DEFAULT_BUDGET_MS = 50
+
+
+def _command(module, args, python, importtime):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.getcwd(), env.get('PYTHONPATH')]))
+    # Measure what users see, with compiled bytecode cached after the first run.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    flags = ['-X', 'importtime'] if importtime else []
+    return [python, *flags, '-m', module, *args], env
+
+def wall_time(module, args=(), runs=5, python=sys.executable):
+    # The fastest of several runs in ms, after one to warm up, since anything slower is
+    # just noise from the machine. -X importtime slows things down itself, so it isn't
+    # used here.
+    command, env = _command(module, args, python, importtime=False)
+    times = []
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=True)
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+def import_times(module, args=(), python=sys.executable):
+    # Each import as (module, self us, cumulative us, depth), from -X importtime.
+    command, env = _command(module, args, python, importtime=True)
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f'{module} failed:\n{result.stderr}')
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+def report(elapsed, imports, top=15):
+    # The slowest imports made directly by the program, rather than by other imports.
+    top_level = sorted((i for i in imports if i[3] == 0), key=lambda i: -i[2])
+    lines = [f'{"module":<40} {"cumulative ms":>14}']
+    for name, _, cumulative_us, _ in top_level[:top]:
+        lines.append(f'{name:<40} {cumulative_us / 1000:>14.1f}')
+    lines.append(f'{"total imports":<40} {sum(i[2] for i in top_level) / 1000:>14.1f}')
+    lines.append(f'{"wall time":<40} {elapsed:>14.1f}')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that a generator script starts up within a time budget.')
+    parser.add_argument('module', nargs='?', default='dummy')
+    parser.add_argument('args', nargs='*', help='Arguments for the module')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS, help='Allowed wall time in ms')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='How many imports to list')
+    args = parser.parse_args()
+
+    elapsed = wall_time(args.module, args.args, args.runs)
+    imports = import_times(args.module, args.args)
+    print(report(elapsed, imports, args.top))
+    if elapsed > args.budget:
+        print(f'{args.module} took {elapsed:.1f}ms, over the {args.budget:g}ms budget', file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,56 @@
 import math
+import functools
+
+import numpy as np
 
 from .data import Parser
+from .geometry import simplify_polygon
+from .pyramid import MapPyramid
+from .clearance import ClearanceField
+from .hittest import map_index
+from .raster import lines_to_polygons, mask_lines
 
 import pyclipper
 from PIL import Image, ImageDraw, ImageFont
 
+# Tried in order. If none of these exist, Pillow's own bundled font is used.
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/ubuntu/Ubuntu-R.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu-sans-fonts/DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+    'DejaVuSans.ttf',
+]
+
+@functools.lru_cache(maxsize=None)
+def load_font(size):
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size=size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Older versions of Pillow only have a fixed size default font.
+        return ImageFont.load_default()
+
 def dist_sq(p1, p2):
     return (p1[0] - p2[0]) ** 2 + (p1[1] - p2[1])**2
 
-def mostly_blue(color):
-    r, g, b, _ = color
-    if white(color):
-        return False
-    return (b > r and b > g)
-
-def white(color):
-    r, g, b, _ = color
-    return (r > 140 and g > 140 and b > 140)
-
 
 class Map:
-    def __init__(self, map_image_filename, location_data_filename, zone_data_filename):
+    def __init__(self, map_image_filename, location_data_filename, zone_data_filename, terrain=None):
+        self.pyramid = MapPyramid(map_image_filename, classifier=terrain)
         self.img = Image.open(map_image_filename)
-        self.img_orig = self.img.copy()
+        self._drawn_on = False
         self.scale_x = 1
         self.scale_y = 1
 
-        self.font = ImageFont.truetype('/usr/share/fonts/truetype/ubuntu/Ubuntu-R.ttf', size=22)
+        # Fonts are only loaded when there's a label to draw.
+        self.font_size = 22
+        self._text_widths = {}
 
         with open(location_data_filename) as f:
             self.location_data = Parser.parse(f.read())
@@ -34,9 +58,31 @@ class Map:
         with open(zone_data_filename) as f:
             self.zone_data = Parser.parse(f.read())
 
+        self._record_index = None
+
+    @property
+    def img_orig(self):
+        return self.pyramid.original()
+
+    @property
+    def font(self):
+        return load_font(self.font_size)
+
+    def text_width(self, text):
+        if text not in self._text_widths:
+            left, _, right, _ = self.font.getbbox(text)
+            self._text_widths[text] = right - left
+        return self._text_widths[text]
+
     def scale(self, x, y):
         w, h = self.img.size
-        self.img = self.img.resize((int(w * x), int(h * y)))
+        size = (int(w * x), int(h * y))
+        # Until something is drawn on it, the image is just the map, so it can come from
+        # the pyramid level closest in size.
+        if self._drawn_on:
+            self.img = self.img.resize(size)
+        else:
+            self.img = self.pyramid.scaled(size)
         self.scale_x *= x
         self.scale_y *= y
 
@@ -45,25 +91,32 @@ class Map:
         return (x * self.scale_x, y * self.scale_y)
 
     def draw_point(self, point, text=None, color=(255, 0, 0, 255)):
-        draw = ImageDraw.Draw(self.img)
-        x, y = point
-        size = 1
-        draw.ellipse((self.scale_point((x-(size+1), y-(size+1))), self.scale_point((x+(size+1),y+(size+1)))), fill=(0, 0, 0, 255))
-        draw.ellipse((self.scale_point((x-size, y-size)), self.scale_point((x+size,y+size))), fill=color)
-
-        if text:
-            text_width, text_height = self.font.getsize(text)
-            text_x, text_y = self.scale_point((x, y))
-            draw.text((text_x - text_width / 2, text_y), text, font=self.font, stroke_fill=(0, 0, 0, 255), stroke_width=1)
+        labels = [(point, text)] if text else []
+        self.draw_overlay(points=[point], labels=labels, point_color=color)
 
     def draw_line(self, line, color=(255, 0, 0, 255), draw_points=False):
+        self.draw_overlay(lines=[line], points=line if draw_points else [], color=color)
+
+    def draw_overlay(self, lines=(), points=(), labels=(), color=(255, 0, 0, 255), point_color=None):
+        # Everything goes through a single draw context, which is much faster than
+        # making a new one for each shape.
+        if point_color is None:
+            point_color = color
+        points = list(points)
         draw = ImageDraw.Draw(self.img)
-        draw.line(line, fill=color, width=1)
+        self._drawn_on = True
+
+        for line in lines:
+            draw.line(line, fill=color, width=1)
 
-        if draw_points:
-            p1, p2 = line
-            self.draw_point(p1, color=color)
-            self.draw_point(p2, color=color)
+        size = 1
+        for outline, fill in ((size + 1, (0, 0, 0, 255)), (size, point_color)):
+            for x, y in points:
+                draw.ellipse((self.scale_point((x-outline, y-outline)), self.scale_point((x+outline, y+outline))), fill=fill)
+
+        for (x, y), text in labels:
+            text_x, text_y = self.scale_point((x, y))
+            draw.text((text_x - self.text_width(text) / 2, text_y), text, font=self.font, stroke_fill=(0, 0, 0, 255), stroke_width=1)
 
     def show(self):
         self.img.show()
@@ -79,43 +132,32 @@ class Map:
         for p in [(590,460), (600, 460), (200, 242)]:
             yield p
 
-    def get_waypoint_lines(self):
+    def get_port_points(self):
+        for record in self.location_data:
+            if 'ID' in record and 'port' in str(record['ID']) and 'x' in record and 'y' in record:
+                yield record['ID'], (record['x'], record['y'])
+
+    def get_waypoint_records(self):
         for record in self.zone_data:
             if 'ID' in record and 'waypoint' in record['ID']:
-                if 'specialX' in record:
-                    yield ((record['x'], record['y']), (record['specialX'], record['specialY']))
-
-
-    def parse_coasts(self):
-        point_coords = set()
+                yield record
 
-        img = self.img_orig
+    def record_index(self):
+        if self._record_index is None:
+            self._record_index = map_index(self)
+        return self._record_index
 
-        # Don't try to parse the edges of the map
-        inset = 10
-        for x in range(inset, img.width - inset):
-            for y in range(inset, img.height - inset):
-
-                middle = img.getpixel((x, y))
+    def get_waypoint_lines(self):
+        for record in self.get_waypoint_records():
+            if 'specialX' in record:
+                yield ((record['x'], record['y']), (record['specialX'], record['specialY']))
 
-                for dx in (-1, 0, 1):
-                    for dy in (-1, 0, 1):
-                        if not (dx == 0 and dy == 0):
-                            p = img.getpixel((x+dx, y+dy))
 
-                            if mostly_blue(p) and (white(middle) or not mostly_blue(middle)):
-                                point_coords.add((x,y))
+    def parse_coasts(self):
+        return mask_lines(np.asarray(self.pyramid.coast()))
 
-        lines = []
-        for x, y in point_coords:
-            for dx in (-1, 0, 1):
-                for dy in (-1, 0, 1):
-                    if not (dx == 0 and dy == 0):
-                        x2 = x + dx
-                        y2 = y + dy
-                        if (x2, y2) in point_coords:
-                            lines.append(((x, y), (x2, y2)))
-        return lines
+    def clearance(self):
+        return ClearanceField(self.pyramid.distance())
 
     def filter_invalid_points(self, lines):
         lake_points = list(self.get_lake_points())
@@ -138,22 +180,7 @@ class Map:
         return scaled_lines
 
     def get_coast_polygons(self):
-        # Turns all of the disjoint lines into polygons, but I need to expand for it to work.
-        pco = pyclipper.PyclipperOffset()
-        for line in self.parse_coasts():
-            path = list(line) + [(line[0][0]+1, line[0][1])]
-            pco.AddPath(path, pyclipper.JT_SQUARE, pyclipper.ET_CLOSEDPOLYGON)
-        solution = pco.Execute2(1)
-
-        # Undo the expansion.
-        pco = pyclipper.PyclipperOffset()
-        for polygon in solution.Childs:
-            pco.AddPath(polygon.Contour, pyclipper.JT_SQUARE, pyclipper.ET_CLOSEDPOLYGON)
-        solution2 = pco.Execute2(-1)
-
-        # I only want the external polygons, this gets rid of lakes and such.
-        for polygon2 in solution2.Childs:
-            yield polygon2.Contour
+        return lines_to_polygons(self.parse_coasts())
 
     def expand_islands(self, expansion):
         pco = pyclipper.PyclipperOffset()
@@ -162,10 +189,17 @@ class Map:
 
         return pyclipper.CleanPolygons(pco.Execute(expansion))
 
-        # for i, poly in enumerate(polygons):
-        #     for p1, p2 in zip(poly, poly[1:] + poly[:1]):
-        #         if mostly_blue(self.img_orig.getpixel(tuple(p1))) and mostly_blue(self.img_orig.getpixel(tuple(p2))):
-        #             yield (tuple(p1), tuple(p2))
+    def simplified_islands(self, expansion, tolerance):
+        # Simplifying can cut into a polygon by up to the tolerance, so expand by that much
+        # more first. That way the result still keeps at least `expansion` away from the coast.
+        polygons = []
+        max_error = 0
+        for polygon in self.expand_islands(expansion + tolerance):
+            simplified, error = simplify_polygon([tuple(p) for p in polygon], tolerance)
+            if len(simplified) >= 3:
+                polygons.append(simplified)
+            max_error = max(max_error, error)
+        return polygons, max_error
 
     def polygon_as_lines(self, polygon, scale=1):
         for p1, p2 in zip(polygon, polygon[1:] + polygon[:1]):
@@ -0,0 +1,94 @@
+import sys
+import argparse
+import collections
+
+from .data import LIST_FIELDS, SUBRECORD_TYPES, Index, Parser, format_record, group_records
+
+
+Conflict = collections.namedtuple('Conflict', ['key', 'field', 'values'])
+
+def signature(group):
+    return tuple(tuple(sorted((key, repr(value)) for key, value in record.items()))
+                 for record in group)
+
+class Merger:
+    def __init__(self):
+        self.groups = []
+        self.conflicts = []
+        self.duplicates = 0
+        self._heads = collections.defaultdict(list)
+        self._signatures = set()
+
+    def add(self, source, records):
+        for group in group_records(records):
+            head = group[0]
+            # The same record shipped by two mods, like a Goodbye option, only needs to be there
+            # once. A subrecord without an ID depends on where it is, so it's always kept.
+            if head.get('ID') is not None:
+                sig = signature(group)
+                if sig in self._signatures:
+                    self.duplicates += 1
+                    continue
+                self._signatures.add(sig)
+
+            # Lone subrecords are appended to the base record, so they can't conflict with each other.
+            if head['__type__'].lower() not in SUBRECORD_TYPES:
+                key = Index.key(head['__type__'], head.get('ID'))
+                for other_source, other in self._heads[key]:
+                    for field, value in head.items():
+                        if field in ('__type__', 'ID') or field in LIST_FIELDS or field not in other:
+                            continue
+                        # Patching a record by cloning it onto itself doesn't conflict with its definition.
+                        if field == 'cloneFrom' and head.get('ID') in (value, other[field]):
+                            continue
+                        if other[field] != value:
+                            self.conflicts.append(Conflict(key, field, [(other_source, other[field]),
+                                                                        (source, value)]))
+                self._heads[key].append((source, head))
+
+            self.groups.append((source, group))
+
+    def add_file(self, filename):
+        with open(filename) as f:
+            self.add(filename, Parser.parse(f.read()))
+
+    def serialize(self):
+        strings = []
+        last_source = None
+        for source, group in self.groups:
+            if source != last_source:
+                strings.append(f'-- From: {source}')
+                last_source = source
+            strings.append('\n'.join(format_record(record) for record in group))
+        return '\n\n'.join(strings)
+
+    def report(self):
+        lines = []
+        for conflict in self.conflicts:
+            record_type, record_id = conflict.key
+            values = ', '.join(f'{source}: {value!r}' for source, value in conflict.values)
+            lines.append(f'{record_type} {record_id}: {conflict.field} conflicts ({values})')
+        lines.append(f'{len(self.groups)} records merged, {self.duplicates} duplicates dropped, '
+                     f'{len(self.conflicts)} conflicts')
+        return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge several mod files into one.')
+    parser.add_argument('mods', nargs='+', help='Mod data files, in load order')
+    parser.add_argument('-o', '--output', help='Where to write the merged mod (default: stdout)')
+    args = parser.parse_args()
+
+    merger = Merger()
+    for filename in args.mods:
+        merger.add_file(filename)
+
+    print(merger.report(), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(merger.serialize())
+    else:
+        print(merger.serialize())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+import heapq
+import itertools
+
+from .geometry import (GridIndex, bounding_box, convex_vertices, cross, distance,
+                       point_in_polygon, point_segment_distance, segment_position,
+                       segments_cross)
+
+# How far outside the clearance area the exit from a port is.
+EXIT_STEP = 1e-6
+
+
+class NavGraph:
+    def __init__(self, polygons, cell_size=32):
+        self.polygons = [[tuple(p) for p in polygon] for polygon in polygons]
+
+        self.edges = GridIndex(cell_size)
+        self.areas = GridIndex(cell_size)
+        self.neighbours = set()
+        self.corners = {}
+        for i, polygon in enumerate(self.polygons):
+            self.areas.insert(i, bounding_box(polygon))
+            for prev, point, following in zip(polygon[-1:] + polygon[:-1], polygon, polygon[1:] + polygon[:1]):
+                self.edges.insert((point, following), bounding_box((point, following)))
+                self.neighbours.add((point, following))
+                self.neighbours.add((following, point))
+                self.corners[point] = (prev, following)
+
+        self.nodes = [point for polygon in self.polygons for point in convex_vertices(polygon)]
+        self.graph = {node: [] for node in self.nodes}
+        for a, b in itertools.combinations(self.nodes, 2):
+            if self.tangent(a, b) and self.tangent(b, a) and self.visible(a, b):
+                d = distance(a, b)
+                self.graph[a].append((b, d))
+                self.graph[b].append((a, d))
+
+        self._links = {}
+
+    def containing_polygon(self, point):
+        for i in self.areas.query_point(point):
+            if point_in_polygon(point, self.polygons[i]):
+                return i
+        return None
+
+    def tangent(self, node, other):
+        # A shortest path only passes a corner if it wraps around it. If the line to the
+        # other point would go between the corner's edges, it isn't worth checking.
+        prev, following = self.corners[node]
+        side1 = cross(node, other, prev)
+        side2 = cross(node, other, following)
+        return not ((side1 > 0 and side2 < 0) or (side1 < 0 and side2 > 0))
+
+    def visible(self, a, b):
+        if (a, b) in self.neighbours:
+            return True
+        edges = list(self.edges.query_segment(a, b))
+        touched = {0.0, 1.0}
+        for c, d in edges:
+            if segments_cross(a, b, c, d):
+                return False
+            touched.update(segment_position(a, b, p) for p in (c, d) if cross(a, b, p) == 0)
+        # Without crossing any edges, a line can still pass into a polygon through its
+        # corners, like a diagonal through a square. Between the corners it touches, each
+        # piece is either all inside or all outside, so checking its middle is enough.
+        # Pieces running along an edge are just following the coast.
+        touched = sorted(t for t in touched if 0 <= t <= 1)
+        for t1, t2 in zip(touched, touched[1:]):
+            t = (t1 + t2) / 2
+            middle = (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t)
+            if any(point_segment_distance(middle, c, d) < 1e-9 for c, d in edges):
+                continue
+            if self.containing_polygon(middle) is not None:
+                return False
+        return True
+
+    def links(self, point):
+        # Edges from a point that isn't a corner. Only the corner ends need to be tangent,
+        # since the route can head off from the point in any direction.
+        if point in self.graph:
+            return self.graph[point]
+        if point not in self._links:
+            self._links[point] = [(node, distance(point, node)) for node in self.nodes
+                                  if self.tangent(node, point) and self.visible(point, node)]
+        return self._links[point]
+
+    def corner_links(self, corner):
+        # A corner a route starts or ends at doesn't have to be wrapped around, so it
+        # links to every corner it can see, not just the tangent ones.
+        key = ('corner', corner)
+        if key not in self._links:
+            self._links[key] = [(node, distance(corner, node)) for node in self.nodes
+                                if node != corner and self.tangent(node, corner) and self.visible(corner, node)]
+        return self._links[key]
+
+    def exit_point(self, point):
+        # Ports sit inside the clearance area around the coast. Routes to and from them
+        # go via the closest point just outside it, which is open water.
+        if point in self.graph:
+            return point
+        polygon = self.containing_polygon(point)
+        if polygon is None:
+            return point
+        vertices = self.polygons[polygon]
+        closest = None
+        for p1, p2 in zip(vertices, vertices[1:] + vertices[:1]):
+            t = max(0, min(1, segment_position(p1, p2, point)))
+            on_edge = (p1[0] + (p2[0] - p1[0]) * t, p1[1] + (p2[1] - p1[1]) * t)
+            d = distance(point, on_edge)
+            if closest is None or d < closest[0]:
+                closest = (d, on_edge, p1, p2)
+        d, on_edge, p1, p2 = closest
+        # Step just past the edge, so the exit isn't on the boundary itself.
+        if d > 0:
+            directions = [((on_edge[0] - point[0]) / d, (on_edge[1] - point[1]) / d)]
+        else:
+            length = distance(p1, p2)
+            normal = ((p2[1] - p1[1]) / length, (p1[0] - p2[0]) / length)
+            directions = [normal, (-normal[0], -normal[1])]
+        for dx, dy in directions:
+            exit = (on_edge[0] + dx * EXIT_STEP, on_edge[1] + dy * EXIT_STEP)
+            if self.containing_polygon(exit) is None:
+                return exit
+        return on_edge
+
+    def route(self, start, goal):
+        start = tuple(start)
+        goal = tuple(goal)
+        start_exit = self.exit_point(start)
+        goal_exit = self.exit_point(goal)
+        path = self._route(start_exit, goal_exit)
+        if path is None:
+            return None
+        if start_exit != start:
+            path.insert(0, start)
+        if goal_exit != goal:
+            path.append(goal)
+        return path
+
+    def _route(self, start, goal):
+        if start == goal:
+            return [start]
+        if self.visible(start, goal):
+            return [start, goal]
+
+        # The graph only has edges that are tangent at both ends. The ends of the route
+        # get their own edges, in both directions.
+        extra = {}
+        for point in (start, goal):
+            links = self.corner_links(point) if point in self.graph else self.links(point)
+            for node, d in links:
+                extra.setdefault(point, []).append((node, d))
+                extra.setdefault(node, []).append((point, d))
+
+        counter = itertools.count()
+        queue = [(distance(start, goal), next(counter), 0, start, None)]
+        came_from = {}
+        best = {start: 0}
+        while queue:
+            _, _, cost, node, parent = heapq.heappop(queue)
+            if node in came_from:
+                continue
+            came_from[node] = parent
+            if node == goal:
+                path = [node]
+                while came_from[path[-1]] is not None:
+                    path.append(came_from[path[-1]])
+                return path[::-1]
+
+            edges = self.graph.get(node, []) + extra.get(node, [])
+            for neighbour, d in edges:
+                new_cost = cost + d
+                if new_cost < best.get(neighbour, float('inf')):
+                    best[neighbour] = new_cost
+                    heapq.heappush(queue, (new_cost + distance(neighbour, goal), next(counter), new_cost, neighbour, node))
+        return None
+
+    def lines(self):
+        for node, edges in self.graph.items():
+            for neighbour, _ in edges:
+                if node < neighbour:
+                    yield (node, neighbour)
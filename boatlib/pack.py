@@ -0,0 +1,91 @@
+import sys
+import argparse
+import collections
+
+from . import schema
+
+HEADER_TYPE = '__header__'
+
+
+def _lines(text):
+    # Each line with the record type it belongs to, and its field name if it has one.
+    record_type = None
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('[') and stripped.endswith(']'):
+            record_type = stripped[1:-1]
+            yield record_type, HEADER_TYPE, line
+        elif '=' in stripped and not stripped.startswith('--'):
+            yield record_type, stripped.split('=', 1)[0], line
+        else:
+            yield record_type, None, line
+
+def _format(value):
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+def minify(text):
+    # Drops indentation, blank lines, and fields set to the value the game would use
+    # anyway. Comments are kept, since they hold the credits.
+    lines = []
+    defaults = {}
+    for record_type, key, line in _lines(text):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if key == HEADER_TYPE:
+            if record_type not in defaults:
+                defaults[record_type] = {k: f'{k}={_format(v)};' for k, v in schema.defaults(record_type).items()}
+        elif key is not None and defaults.get(record_type, {}).get(key) == stripped:
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines)
+
+def size_breakdown(text):
+    # Bytes used by each record type, and by each field of each record type. Line
+    # endings are counted with the line they end.
+    by_type = collections.Counter()
+    records = collections.Counter()
+    by_field = collections.Counter()
+    for record_type, key, line in _lines(text):
+        size = len(line.encode()) + 1
+        by_type[record_type] += size
+        if key == HEADER_TYPE:
+            records[record_type] += 1
+        elif key is not None:
+            by_field[(record_type, key)] += size
+    return by_type, records, by_field
+
+def report(text, fields=20):
+    by_type, records, by_field = size_breakdown(text)
+    total = sum(by_type.values())
+    lines = [f'{"record type":<24} {"records":>8} {"bytes":>9} {"share":>6}']
+    for record_type, size in by_type.most_common():
+        name = record_type if record_type is not None else '(comments)'
+        lines.append(f'{name:<24} {records[record_type]:>8} {size:>9} {size / total:>6.1%}')
+    lines.append(f'{"total":<24} {sum(records.values()):>8} {total:>9}')
+    lines.append('')
+    lines.append(f'{"field":<40} {"bytes":>9} {"share":>6}')
+    for (record_type, key), size in by_field.most_common(fields):
+        lines.append(f'{f"{record_type}.{key}":<40} {size:>9} {size / total:>6.1%}')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report what takes up space in a mod file, and shrink it.')
+    parser.add_argument('filename')
+    parser.add_argument('--minify', action='store_true', help='Print the minified file')
+    parser.add_argument('--fields', type=int, default=20, help='How many of the largest fields to list')
+    args = parser.parse_args()
+
+    with open(args.filename) as f:
+        text = f.read()
+    print(report(text, args.fields), file=sys.stderr)
+    if args.minify:
+        minified = minify(text)
+        print(f'Minified: {len(text.encode())} -> {len(minified.encode())} bytes', file=sys.stderr)
+        print(minified)
+
+if __name__ == '__main__':
+    main()
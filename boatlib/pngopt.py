@@ -0,0 +1,122 @@
+import io
+import os
+import sys
+import struct
+import shutil
+import hashlib
+import argparse
+
+from PIL import Image
+
+CACHE_DIR = '.pngopt_cache'
+
+# zlib strategies: default, filtered, huffman only, RLE, fixed
+COMPRESS_TYPES = (0, 1, 2, 3, 4)
+
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+KEEP_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'IDAT', b'IEND'}
+
+
+def strip_chunks(data):
+    # Drops everything but the image data itself, without re-encoding it.
+    chunks = [PNG_MAGIC]
+    offset = len(PNG_MAGIC)
+    while offset < len(data):
+        length, = struct.unpack('>I', data[offset:offset + 4])
+        end = offset + length + 12
+        if data[offset + 4:offset + 8] in KEEP_CHUNKS:
+            chunks.append(data[offset:end])
+        offset = end
+    return b''.join(chunks)
+
+
+def to_palette(img):
+    colors = img.getcolors(256)
+    if colors is None:
+        return None
+
+    # Translucent colours go first so the transparency chunk can stop at the last one.
+    colors = sorted((color for _, color in colors), key=lambda c: c[3] == 255)
+    lookup = {color: i for i, color in enumerate(colors)}
+
+    palette = Image.new('P', img.size)
+    palette.putpalette([channel for color in colors for channel in color[:3]])
+    data = img.tobytes()
+    palette.putdata([lookup[tuple(data[i:i + 4])] for i in range(0, len(data), 4)])
+
+    alphas = bytes(color[3] for color in colors if color[3] != 255)
+    return palette, alphas
+
+def palette_bits(img):
+    return max(1, img.getextrema()[1].bit_length())
+
+def candidates(img):
+    # The existing palette is often already well ordered, so try it as is.
+    if img.mode == 'P':
+        options = {'bits': palette_bits(img)}
+        if 'transparency' in img.info:
+            options['transparency'] = img.info['transparency']
+        yield img, options
+
+    rgba = img.convert('RGBA')
+    # Only keep the alpha channel if something actually uses it.
+    if rgba.getextrema()[3] == (255, 255):
+        yield rgba.convert('RGB'), {}
+    else:
+        yield rgba, {}
+
+    palette = to_palette(rgba)
+    if palette is not None:
+        palette_img, alphas = palette
+        options = {'bits': palette_bits(palette_img)}
+        if alphas:
+            options['transparency'] = alphas
+        yield palette_img, options
+
+def optimize(data):
+    img = Image.open(io.BytesIO(data))
+    pixels = img.convert('RGBA').tobytes()
+
+    best = strip_chunks(data)
+    for candidate, options in candidates(img):
+        for compress_type in COMPRESS_TYPES:
+            out = io.BytesIO()
+            # Nothing from img.info is passed along, so the metadata chunks are dropped.
+            candidate.save(out, 'PNG', optimize=True, compress_type=compress_type, **options)
+            encoded = out.getvalue()
+            if len(encoded) >= len(best):
+                continue
+            if Image.open(io.BytesIO(encoded)).convert('RGBA').tobytes() != pixels:
+                continue
+            best = encoded
+    return best
+
+def optimize_file(src, dest, cache_dir=CACHE_DIR):
+    with open(src, 'rb') as f:
+        data = f.read()
+
+    cached = os.path.join(cache_dir, hashlib.sha256(data).hexdigest() + '.png')
+    if not os.path.exists(cached):
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cached + '.tmp', 'wb') as f:
+            f.write(optimize(data))
+        os.replace(cached + '.tmp', cached)
+
+    shutil.copyfile(cached, dest)
+    return len(data), os.path.getsize(dest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Losslessly shrink PNG textures.')
+    parser.add_argument('directory', help='Where to write the optimized images')
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--cache', default=CACHE_DIR, help=f'Cache directory (default: {CACHE_DIR})')
+    args = parser.parse_args()
+
+    for src in args.images:
+        dest = os.path.join(args.directory, os.path.basename(src))
+        before, after = optimize_file(src, dest, cache_dir=args.cache)
+        print(f'{src}: {before} -> {after} bytes', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
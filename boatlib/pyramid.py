@@ -0,0 +1,115 @@
+import os
+import hashlib
+
+import numpy as np
+from PIL import Image
+
+from .raster import TerrainClassifier, coast_mask, distance_transform
+
+
+class MapPyramid:
+    # Everything derived from a map image, computed at most once. Layers are stored in a
+    # directory next to the image, and named after its size and modification time so
+    # they're recomputed whenever the image changes, without reading all of it first.
+    def __init__(self, filename, cache_dir=None, classifier=None):
+        self.filename = filename
+        if classifier is None:
+            classifier = TerrainClassifier()
+        self.classifier = classifier
+        if cache_dir is None:
+            cache_dir = filename + '.cache'
+        self.cache_dir = cache_dir
+
+        stat = os.stat(filename)
+        self.hash = hashlib.sha256(f'{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()[:16]
+
+        self._size = None
+        self._original = None
+        self._layers = {}
+
+    @property
+    def size(self):
+        # Only reads the image header.
+        if self._size is None:
+            with Image.open(self.filename) as img:
+                self._size = img.size
+        return self._size
+
+    def path(self, name, extension):
+        return os.path.join(self.cache_dir, f'{self.hash}_{name}.{extension}')
+
+    def original(self):
+        if self._original is None:
+            self._original = Image.open(self.filename).convert('RGBA')
+        return self._original
+
+    def level(self, n):
+        # Level n is the original image scaled down by 2^n.
+        if n == 0:
+            return self.original()
+        key = f'level{n}'
+        if key not in self._layers:
+            path = self.path(key, 'png')
+            if os.path.exists(path):
+                img = Image.open(path)
+            else:
+                previous = self.level(n - 1)
+                img = previous.resize((max(1, previous.width // 2), max(1, previous.height // 2)),
+                                      Image.Resampling.BOX)
+                self._save(path, lambda tmp: img.save(tmp, 'PNG'))
+            self._layers[key] = img
+        return self._layers[key]
+
+    def scaled(self, size):
+        # The image at any size, resized from the smallest level that's still at least
+        # that big, rather than from the full image.
+        n = 0
+        width, height = self.size
+        while width // 2 >= size[0] and height // 2 >= size[1] and width > 1 and height > 1:
+            width, height = width // 2, height // 2
+            n += 1
+        img = self.level(n)
+        if img.size == tuple(size):
+            return img.copy()
+        return img.resize(size)
+
+    def layer(self, name, compute):
+        if name not in self._layers:
+            path = self.path(name, 'npy')
+            if os.path.exists(path):
+                self._layers[name] = np.load(path, mmap_mode='r')
+            else:
+                array = compute()
+                self._save(path, lambda tmp: np.save(tmp, array))
+                self._layers[name] = array
+        return self._layers[name]
+
+    def _save(self, path, write):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def pixels(self):
+        return np.asarray(self.original())
+
+    def terrain_layer(self, name, compute):
+        # These depend on how the terrain was classified, as well as on the image.
+        return self.layer(f'{name}_{self.classifier.key}', compute)
+
+    def terrain(self):
+        return self.terrain_layer('terrain', lambda: self.classifier.classify(Image.open(self.filename)))
+
+    def water(self):
+        return self.terrain_layer('water', lambda: self.classifier.water(np.asarray(self.terrain())))
+
+    def land(self):
+        return self.terrain_layer('land', lambda: ~np.asarray(self.water()))
+
+    def coast(self):
+        return self.terrain_layer('coast', lambda: coast_mask(np.asarray(self.water())))
+
+    def distance(self):
+        # How far each pixel is from the nearest land.
+        return self.terrain_layer('distance', lambda: distance_transform(np.asarray(self.land())))
@@ -0,0 +1,156 @@
+import json
+import hashlib
+
+import numpy as np
+import pyclipper
+
+NEIGHBOURS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if not (dx == 0 and dy == 0)]
+
+
+# Rules are tried in order, and the first one that matches a colour decides its class.
+# Colours that don't match anything get the default class. By default, whitish pixels
+# are land and anything mostly blue is water.
+DEFAULT_TERRAIN = {
+    'default': 'land',
+    'water': ['water'],
+    'classes': [
+        {'name': 'white', 'min': [141, 141, 141]},
+        {'name': 'water', 'dominant': 'b'},
+    ],
+}
+
+CHANNELS = {'r': 0, 'g': 1, 'b': 2}
+
+
+class TerrainClassifier:
+    def __init__(self, config=None):
+        if config is None:
+            config = DEFAULT_TERRAIN
+        self.config = config
+        self.names = [config['default']]
+        for rule in config['classes']:
+            if rule['name'] not in self.names:
+                self.names.append(rule['name'])
+        self.key = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:8]
+        self._lut = None
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename) as f:
+            return cls(json.load(f))
+
+    def _classify_colours(self, r, g, b):
+        channels = (r, g, b)
+        shape = np.broadcast(r, g, b).shape
+        classes = np.zeros(shape, dtype=np.uint8)
+        # Going backwards lets earlier rules overwrite later ones.
+        for rule in reversed(self.config['classes']):
+            match = np.ones(shape, dtype=bool)
+            if 'min' in rule:
+                for channel, low in zip(channels, rule['min']):
+                    match &= channel >= low
+            if 'max' in rule:
+                for channel, high in zip(channels, rule['max']):
+                    match &= channel <= high
+            if 'dominant' in rule:
+                dominant = channels[CHANNELS[rule['dominant']]]
+                for name, i in CHANNELS.items():
+                    if name != rule['dominant']:
+                        match &= dominant > channels[i]
+            classes[match] = self.names.index(rule['name'])
+        return classes
+
+    @property
+    def lut(self):
+        # Every possible colour, classified once.
+        if self._lut is None:
+            values = np.arange(256, dtype=np.int16)
+            self._lut = self._classify_colours(values[:, None, None], values[None, :, None], values[None, None, :])
+        return self._lut
+
+    def classify(self, img):
+        if img.mode == 'P':
+            # Only the palette needs classifying.
+            palette = np.array(img.getpalette()[:768], dtype=np.int16).reshape(-1, 3)
+            classes = self._classify_colours(palette[:, 0], palette[:, 1], palette[:, 2])
+            return classes[np.asarray(img)]
+        pixels = np.asarray(img.convert('RGB'))
+        return self.lut[pixels[..., 0], pixels[..., 1], pixels[..., 2]]
+
+    def mask(self, classes, names):
+        indices = [self.names.index(name) for name in names]
+        return np.isin(classes, indices)
+
+    def water(self, classes):
+        return self.mask(classes, self.config['water'])
+
+def coast_mask(water, inset=10):
+    # Pixels that aren't water, but are next to some. The edges of the map are left out.
+    h, w = water.shape
+    near_water = np.zeros_like(water)
+    inner = near_water[inset:h - inset, inset:w - inset]
+    for dx, dy in NEIGHBOURS:
+        inner |= water[inset + dy:h - inset + dy, inset + dx:w - inset + dx]
+    return near_water & ~water
+
+def shift(mask, dx, dy):
+    # shifted[y, x] == mask[y + dy, x + dx], with False past the edges.
+    h, w = mask.shape
+    shifted = np.zeros_like(mask)
+    shifted[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)] = \
+        mask[max(0, dy):h - max(0, -dy), max(0, dx):w - max(0, -dx)]
+    return shifted
+
+def mask_lines(mask):
+    lines = []
+    for dx, dy in NEIGHBOURS:
+        # Pixels whose neighbour in this direction is also set.
+        ys, xs = np.nonzero(mask & shift(mask, dx, dy))
+        lines.extend(((x, y), (x + dx, y + dy)) for x, y in zip(xs.tolist(), ys.tolist()))
+    return lines
+
+def lines_to_polygons(lines):
+    # Turns all of the disjoint lines into polygons, but I need to expand for it to work.
+    pco = pyclipper.PyclipperOffset()
+    for line in lines:
+        path = list(line) + [(line[0][0]+1, line[0][1])]
+        pco.AddPath(path, pyclipper.JT_SQUARE, pyclipper.ET_CLOSEDPOLYGON)
+    solution = pco.Execute2(1)
+
+    # Undo the expansion.
+    pco = pyclipper.PyclipperOffset()
+    for polygon in solution.Childs:
+        pco.AddPath(polygon.Contour, pyclipper.JT_SQUARE, pyclipper.ET_CLOSEDPOLYGON)
+    solution2 = pco.Execute2(-1)
+
+    # I only want the external polygons, this gets rid of lakes and such.
+    for polygon2 in solution2.Childs:
+        yield polygon2.Contour
+
+def distance_transform(mask):
+    # Exact Euclidean distance from every pixel to the nearest True pixel.
+    h, w = mask.shape
+    far = float(h + w)
+
+    # Distance to the nearest True pixel in the same column.
+    column = np.empty(mask.shape, dtype=np.float32)
+    column[0] = np.where(mask[0], 0, far)
+    for y in range(1, h):
+        column[y] = np.where(mask[y], 0, column[y - 1] + 1)
+    for y in range(h - 2, -1, -1):
+        np.minimum(column[y], column[y + 1] + 1, out=column[y])
+
+    # Then look along each row. Checking columns k pixels away can't help once k^2 is
+    # larger than the distance we've already found, so each block of rows stops as soon as it can.
+    column_sq = column ** 2
+    dist_sq = column_sq.copy()
+    block = 32
+    for start in range(0, h, block):
+        rows = column_sq[start:start + block]
+        best = dist_sq[start:start + block]
+        for k in range(1, w):
+            if best.max() <= k * k:
+                break
+            np.minimum(best[:, k:], rows[:, :-k] + k * k, out=best[:, k:])
+            np.minimum(best[:, :-k], rows[:, k:] + k * k, out=best[:, :-k])
+    return np.sqrt(dist_sq)
@@ -0,0 +1,175 @@
+import sys
+import difflib
+import argparse
+import importlib
+import collections
+
+from .data import Serialize
+
+Field = collections.namedtuple('Field', 'name type multiple default', defaults=(None,))
+Issue = collections.namedtuple('Issue', 'record_type record_id field message')
+
+SCHEMAS = {}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_ref(value):
+    return isinstance(value, str) or isinstance(value, Serialize)
+
+# Numeric fields also take formula strings, and sometimes the ID of another record.
+TYPE_CHECKS = {
+    'str': lambda value: isinstance(value, str),
+    'bool': lambda value: isinstance(value, bool),
+    'int': lambda value: (_is_number(value) and float(value).is_integer()) or isinstance(value, str),
+    'float': lambda value: _is_number(value) or isinstance(value, str),
+    'ref': _is_ref,
+    'value': lambda value: _is_number(value) or _is_ref(value),
+}
+
+
+def field(name, type='str', multiple=False, default=None):
+    return Field(name, type, multiple, default)
+
+def register(record_type, *fields, base=None):
+    schema = dict(SCHEMAS[base]) if base else {}
+    schema.update((f.name, f) for f in fields)
+    SCHEMAS[record_type] = schema
+    return schema
+
+register('ItemType',
+         field('cloneFrom', 'ref'), field('name'), field('description'), field('texture'),
+         field('sprite', 'int'), field('spriteWhenHeld', 'int'), field('pR'), field('pG'), field('pB'),
+         field('itemCategory'), field('element', multiple=True), field('harmful', 'bool'),
+         field('special', multiple=True), field('weight', 'float'), field('volume', 'float'),
+         field('value', 'int'), field('power', 'int'), field('action', 'ref'), field('stackable', 'bool'),
+         field('combineWith', 'ref', multiple=True), field('toMake', 'ref', multiple=True),
+         field('consumeOnCombine', 'bool', multiple=True), field('journalID', 'ref'),
+         field('spawnFX', 'ref'), field('spawnFXColor'), field('depthMod', 'float'))
+register('ItemReaction',
+         field('element', multiple=True), field('newID', 'ref'), field('action', 'ref'),
+         field('spawnItem', 'ref', multiple=True), field('chance', 'float'), field('aiRatingMod', 'int'),
+         field('aiRatingModForHostilesOnly', 'bool'))
+register('ActorTypeReaction', base='ItemReaction')
+register('ItemLight',
+         field('red', 'float'), field('green', 'float'), field('blue', 'float'), field('alpha', 'float'),
+         field('size', 'float'), field('flicker', 'bool'))
+register('GlobalTrigger',
+         field('aliasID'), field('reqFormula'),
+         field('topX', 'int', default=0), field('topY', 'int', default=0),
+         field('btmX', 'int', default=0), field('btmY', 'int', default=0))
+register('GlobalTriggerEffect',
+         field('effectID'), field('xValue', 'int'), field('yValue', 'int'), field('delay', 'float'),
+         field('sValue'), field('sValue2'), field('fValue', 'float'), field('fValue2', 'float'),
+         field('bValue', 'bool'), field('bValue2', 'bool'))
+register('Action',
+         field('cloneFrom', 'ref'), field('name'), field('casterAnimation'),
+         field('casterAnimationDependsOnWeaponHand', 'bool'), field('special', multiple=True),
+         field('FXChangesWithWeaponHand', 'bool'), field('FXOnTarget', multiple=True),
+         field('FXOnCaster', multiple=True), field('applyWeaponBuffs', 'bool'),
+         field('chargeTime', 'int'), field('AIRatingBonus', 'int'))
+register('ActionAOE',
+         field('cloneFrom', 'ref'), field('shape', 'int'), field('needsLoS', 'bool'),
+         field('needsLoE', 'bool'), field('airborne', 'bool'), field('arc', 'bool'),
+         field('minRange', 'float'), field('maxRange', 'float'), field('maxRangeBonus', 'float'),
+         field('bypassAll', 'bool'), field('occupyAll', 'bool'), field('coneAngle', 'int'),
+         field('aoeCasterAsOrigin', 'bool'), field('maxRangeAddDistanceFromCaster', 'bool'),
+         field('fReq'))
+register('AvAffecterAOE', base='ActionAOE')
+register('AvAffecter',
+         field('actorValue'), field('magnitude', 'value'), field('duration', 'int'),
+         field('chance', 'float'), field('element', multiple=True), field('harmful', 'bool'),
+         field('weaponAvAffecter', 'bool'), field('FXOnTile', multiple=True),
+         field('useSeparateChanceRoll', 'bool'))
+register('DialogNode',
+         field('statements', multiple=True), field('animations', multiple=True),
+         field('nextNodeID', 'ref'), field('specialEffect', multiple=True),
+         field('speakerOverride'), field('fReq'))
+register('DialogNodeOverride', field('dialogNodeID_toOverride', 'ref'), base='DialogNode')
+register('DialogOption',
+         field('text'), field('nodeToConnectTo', 'ref'), field('formulaReq'),
+         field('bottomOption', 'bool'), field('newLineOfOptions', 'bool'),
+         field('specialEffect', multiple=True))
+register('ActorPrefab',
+         field('actorTypeID', 'ref'), field('name'), field('hostile', 'bool'), field('faction'),
+         field('combatTeam'), field('aiScript'), field('skinPalette'), field('armorPalette'),
+         field('unarmoredPalette'), field('clothPalette'), field('playerCanOpenInv', 'bool'),
+         field('unkillable', 'bool'))
+register('ActorType',
+         field('cloneFrom', 'ref'), field('special', multiple=True), field('innateActions', 'ref'))
+register('ActorTypeDetectAoE',
+         field('cloneFrom', 'ref'), field('coneAngle', 'int'), field('maxRange', 'float'))
+register('FormulaGlobal', field('formula'))
+register('JournalEntry',
+         field('category'), field('halfPage', 'bool'), field('rarity', 'int'), field('text'))
+
+
+def defaults(record_type):
+    # The values the game assumes when a field is left out.
+    return {name: f.default for name, f in SCHEMAS.get(record_type, {}).items() if f.default is not None}
+
+def suggest(name, known):
+    # Differences in case are the most common mistake, so they win outright.
+    lowered = {key.lower(): key for key in known}
+    if name.lower() in lowered:
+        return lowered[name.lower()]
+    matches = difflib.get_close_matches(name, known, n=1, cutoff=0.75)
+    return matches[0] if matches else None
+
+def validate_record(record, owner_id=None):
+    record_type = record.record_type
+    record_id = record.id if isinstance(record.id, str) else owner_id
+    schema = SCHEMAS.get(record_type)
+    if schema is not None:
+        for key, value in record.properties.items():
+            name = key[1:] if key.startswith('!') else key
+            f = schema.get(name)
+            if f is None:
+                hint = suggest(name, schema)
+                message = f'unknown field, did you mean {hint}?' if hint else 'unknown field'
+                yield Issue(record_type, record_id, key, message)
+                continue
+            if value is None or key.startswith('!'):
+                # Replacement lists are already joined into a single string.
+                continue
+            if isinstance(value, list):
+                if not f.multiple:
+                    yield Issue(record_type, record_id, key, 'only takes a single value')
+                values = value
+            else:
+                values = [value]
+            check = TYPE_CHECKS[f.type]
+            for v in values:
+                if v is not None and not check(v):
+                    yield Issue(record_type, record_id, key, f'expected {f.type}, got {type(v).__name__}')
+    for subtype in record.subtypes:
+        if subtype is not None:
+            yield from validate_record(subtype, record_id)
+
+def validate(collection):
+    issues = []
+    for item in collection.walk():
+        if isinstance(item, Serialize):
+            issues.extend(validate_record(item))
+    return issues
+
+def report(issues):
+    return '\n'.join(f'{issue.record_type} {issue.record_id}: {issue.field}: {issue.message}'
+                     for issue in issues)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check generated records against the known fields for each type.')
+    parser.add_argument('generator', help='A function returning a Collection, such as farm_mod.plants:define_plants')
+    args = parser.parse_args()
+
+    module_name, function_name = args.generator.split(':')
+    collection = getattr(importlib.import_module(module_name), function_name)()
+    issues = validate(collection)
+    if issues:
+        print(report(issues), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import sys
+import time
+import argparse
+
+from .data import ZoneRecord, collect_records, format_record
+from .map import Map
+from .nav import NavGraph
+
+
+def waypoint_records(lines, record_type, prefix='waypoint_auto_'):
+    for i, ((x1, y1), (x2, y2)) in enumerate(lines):
+        ZoneRecord(record_type, f'{prefix}{i}',
+                   x=round(x1), y=round(y1),
+                   specialX=round(x2), specialY=round(y2))
+
+def generate(m, expansion=4, tolerance=2, record_type=None, lines=None):
+    if record_type is None:
+        existing = next(m.get_waypoint_records(), None)
+        if existing is None:
+            raise ValueError('no existing waypoints to take the record type from, record_type must be given')
+        record_type = existing['__type__']
+
+    if lines is None:
+        islands, _ = m.simplified_islands(expansion, tolerance)
+        lines = NavGraph(islands).lines()
+    with collect_records() as c:
+        waypoint_records(sorted(lines), record_type)
+        return c
+
+def port_overlaps(m, generated, radius=4):
+    # Waypoints that pass right over a port make boats clip through the docks.
+    index = m.record_index()
+    ports = {port_id for port_id, _ in m.get_port_points()}
+    for record in generated.items:
+        p = record.properties
+        line = ((p['x'], p['y']), (p['specialX'], p['specialY']))
+        for hit in index.query_segment(*line, radius=radius):
+            if hit.get('ID') in ports:
+                yield record.id, hit['ID']
+
+def replace_waypoints(m, generated):
+    # The zone data without the hand-placed waypoints, followed by the generated ones.
+    records = [format_record(record) for record in m.zone_data
+               if not ('ID' in record and 'waypoint' in record['ID'])]
+    records.append(generated.serialize())
+    return '\n\n'.join(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate waypoint records from the coastline of a map.')
+    parser.add_argument('image')
+    parser.add_argument('locations')
+    parser.add_argument('zones')
+    parser.add_argument('--expansion', type=int, default=4, help='How far to keep from the coast')
+    parser.add_argument('--tolerance', type=int, default=2, help='How far simplified coasts can stray')
+    parser.add_argument('--record-type', help='Defaults to the type of the existing waypoints')
+    parser.add_argument('--replace', action='store_true',
+                        help='Print the whole zone file, with the generated waypoints instead of the existing ones')
+    parser.add_argument('--port-clearance', type=int, default=4, help='Warn about waypoints closer than this to a port')
+    args = parser.parse_args()
+
+    start = time.time()
+    m = Map(args.image, args.locations, args.zones)
+    generated = generate(m, args.expansion, args.tolerance, args.record_type)
+    print(f'Generated {len(generated.items)} waypoints in {time.time() - start:.2f}s', file=sys.stderr)
+    for waypoint_id, port_id in port_overlaps(m, generated, args.port_clearance):
+        print(f'Warning: {waypoint_id} passes within {args.port_clearance} of {port_id}', file=sys.stderr)
+
+    if args.replace:
+        print(replace_waypoints(m, generated))
+    else:
+        print(generated.serialize())
+
+if __name__ == '__main__':
+    main()
@@ -7,16 +7,22 @@ from boatlib.data import (
     AvAffecter,
     AvAffecterAOE,
     DialogNode,
-    DialogOption,
     Duration,
     FURNACE_IDS,
+    Index,
     ItemReaction,
     ItemType,
+    attach_options,
     collect_records,
+    load_records,
 )
 
+# Ports with a dojo, for when there's no base game data to look them up in.
+DOJO_PORTS = (6, 7, 12, 15, 20, 21, 29)
+DOJO_PATTERN = 'port*_dojo[34]'
 
-def define_dummy():
+
+def define_dummy(dojo_nodes=None):
     with collect_records() as c:
         ActorPrefab('dehydrated_dummy',
                     name='Dummy',
@@ -67,11 +73,11 @@ def define_dummy():
                                  ]))
             ])
 
-        add_dialog(item)
+        add_dialog(item, dojo_nodes)
         return c
 
 
-def add_dialog(item):
+def add_dialog(item, dojo_nodes=None):
     buy_node = DialogNode(
         'dojo_buy_dummy',
         statements=[
@@ -93,14 +99,28 @@ def add_dialog(item):
                         formulaReq='1000 - m:money')
     buy_node.add_option('No', 'previous', newLineOfOptions=True)
 
-    for port in (6, 7, 12, 15, 20, 21, 29):
-        for node in (f'port{port}_dojo3', f'port{port}_dojo4'):
-            DialogOption('Buy a training dummy',
-                         buy_node,
-                         newLineOfOptions=True,
-                         ID=node)
-        DialogOption('Goodbye', '', bottomOption=True, ID=f'port{port}_dojo4')
+    if dojo_nodes is None:
+        dojo_nodes = [f'port{port}_dojo{n}' for port in DOJO_PORTS for n in (3, 4)]
+
+    attach_options(dojo_nodes, [
+        ('*', 'Buy a training dummy', buy_node, dict(newLineOfOptions=True)),
+        ('*_dojo4', 'Goodbye', '', dict(bottomOption=True)),
+    ])
+
+def find_dojo_nodes(base_files):
+    return Index(load_records(*base_files)).select('DialogNode', DOJO_PATTERN)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate the dehydrated dummy mod.')
+    parser.add_argument('base', nargs='*',
+                        help='Base game dialog files to find the dojo nodes in (default: a built in list of ports)')
+    args = parser.parse_args()
 
+    dojo_nodes = find_dojo_nodes(args.base) if args.base else None
+    print(define_dummy(dojo_nodes).serialize())
 
 if __name__ == '__main__':
-    print(define_dummy().serialize())
+    main()
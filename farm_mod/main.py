@@ -1,9 +1,48 @@
+import sys
+import argparse
+import functools
+import collections
+
 import boatlib.data
 from . import plants
 from . import tools
 from . import dialogs
 
-if __name__ == '__main__':
+
+def count_records(collection):
+    counts = collections.Counter()
+    records = [item for item in collection.walk() if isinstance(item, boatlib.data.Serialize)]
+    while records:
+        record = records.pop()
+        counts[record.record_type] += 1
+        records.extend(subtype for subtype in record.subtypes if subtype is not None)
+    return counts
+
+def growth_report():
+    counts = {encoding: count_records(plants.define_plants(encoding))
+              for encoding in plants.GROWTH_ENCODINGS}
+    record_types = sorted(set().union(*counts.values()))
+    lines = [' '.join([f'{"record type":<20}'] + [f'{encoding:>8}' for encoding in counts])]
+    for record_type in record_types:
+        lines.append(' '.join([f'{record_type:<20}'] + [f'{counts[e][record_type]:>8}' for e in counts]))
+    lines.append(' '.join([f'{"total":<20}'] + [f'{sum(counts[e].values()):>8}' for e in counts]))
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the farming mod.")
+    parser.add_argument('--growth', choices=plants.GROWTH_ENCODINGS, default='chain',
+                        help='How crops count down the days until they grow (default: chain)')
+    parser.add_argument('--report', action='store_true',
+                        help='Compare the number of records made by each growth encoding')
+    parser.add_argument('--size-report', action='store_true',
+                        help='Show how much of the output each record type and field takes up')
+    parser.add_argument('--minify', action='store_true',
+                        help='Leave out indentation, blank lines and default values')
+    args = parser.parse_args()
+
+    if args.report:
+        print(growth_report(), file=sys.stderr)
+
     with boatlib.data.collect_records() as c:
         boatlib.data.Comment('''
         Horizon's Gate Farming Mod
@@ -11,7 +50,20 @@ if __name__ == '__main__':
         By: rcfox (https://github.com/rcfox/HorizonsGateMods)
         Crop sprites by: josehzz (https://opengameart.org/content/farming-crops-16x16)
         ''')
-        tools.define_tools()
-        plants.define_plants()
-        dialogs.define_dialogs()
-        print(c.serialize())
+        boatlib.data.generate_parallel(
+            tools.define_tools,
+            functools.partial(plants.define_plants, args.growth),
+            dialogs.define_dialogs)
+
+    text = c.serialize()
+    if args.minify or args.size_report:
+        # boatlib.pack brings in the schema, which isn't needed for a plain run.
+        from boatlib import pack
+    if args.minify:
+        text = pack.minify(text)
+    if args.size_report:
+        print(pack.report(text), file=sys.stderr)
+    print(text)
+
+if __name__ == '__main__':
+    main()
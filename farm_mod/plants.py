@@ -1,4 +1,3 @@
-import networkx
 from boatlib.data import (
     Action,
     ActionAOE,
@@ -18,6 +17,12 @@ from boatlib.data import (
     generate_id
 )
 
+def new_graph():
+    # networkx takes longer to import than everything else put together, so it's only
+    # loaded once a crop is actually being defined.
+    import networkx
+    return networkx.MultiDiGraph()
+
 MONSTER_EAT_CROP = ItemReaction(element='fakeElec',
                                 newID='X',
                                 aiRatingMod=999,
@@ -119,8 +124,8 @@ def define_ambush(crops):
     Action('activate_crop_harvest_ambush',
            av_affecters=affecters)
 
-def define_turnip():
-    G = networkx.MultiDiGraph()
+def define_turnip(encoding='chain'):
+    G = new_graph()
     G.add_edge('turnip', 'turnip_seeds', element='smash', spawnItem=['turnip_seeds', 'turnip_seeds'])
     G.add_edge('turnip_seeds', 'turnip_seeds_watered', element='water')
     G.add_edge('turnip_seeds_watered', 'turnip_sprout', element='newDay', count=3,
@@ -203,12 +208,12 @@ def define_turnip():
                          action='activate_crop_harvest_ambush')
         ]
     )
-    graph_to_plants(expand_graph(G))
+    graph_to_plants(expand_graph(G, encoding))
 
     return 'turnip_mature', 'turnip'
 
-def define_wheat():
-    G = networkx.MultiDiGraph()
+def define_wheat(encoding='chain'):
+    G = new_graph()
     G.add_edge('cargo_grain', 'wheat_seeds', element='smash', spawnItem=['wheat_seeds', 'wheat_seeds'])
     G.add_edge('wheat_seeds', 'wheat_seeds_watered', element='water')
     G.add_edge('wheat_seeds_watered', 'wheat_sprout', element='newDay', count=3,
@@ -305,13 +310,13 @@ def define_wheat():
                          action='activate_crop_harvest_ambush')
         ]
     )
-    graph_to_plants(expand_graph(G))
+    graph_to_plants(expand_graph(G, encoding))
 
     return 'wheat_ripe', 'cargo_grain'
 
 
-def define_corn():
-    G = networkx.MultiDiGraph()
+def define_corn(encoding='chain'):
+    G = new_graph()
     G.add_edge('corn', 'corn_seeds', element='smash', spawnItem=['corn_seeds', 'corn_seeds'])
     G.add_edge('corn_seeds', 'corn_seeds_watered', element='water')
     G.add_edge('corn_seeds_watered', 'corn_sprout', element='newDay', count=3,
@@ -412,12 +417,12 @@ def define_corn():
                          action='activate_crop_harvest_ambush')
         ]
     )
-    graph_to_plants(expand_graph(G))
+    graph_to_plants(expand_graph(G, encoding))
 
     return 'corn_ripe', 'corn'
 
 def define_aldleaf_plant():
-    G = networkx.MultiDiGraph()
+    G = new_graph()
     G.add_edge('aldleaf', 'aldleafSeeds', element='smash')
     G.add_edge('aldleafSeeds', 'aldleafSeeds_watered', element='water')
     G.add_edge('aldleafSeeds_watered', 'aldleafSprout', element='newDay')
@@ -506,7 +511,17 @@ def define_aldleaf_plant():
 
     return graph_to_plants(expand_graph(G))
 
-def expand_graph(G):
+# How multi-day growth is encoded:
+#   chain:  a hidden clone of the item for each remaining day, so growth takes exactly
+#           the given number of days.
+#   chance: a single newDay reaction that fires with a 1 in count chance each day. The
+#           growth time is random, but takes count days on average and needs no clones.
+GROWTH_ENCODINGS = ('chain', 'chance')
+
+def expand_graph(G, encoding='chain'):
+    if encoding not in GROWTH_ENCODINGS:
+        raise ValueError(f'unknown growth encoding: {encoding}')
+
     to_remove = []
     to_add = []
     nodes = []
@@ -520,6 +535,19 @@ def expand_graph(G):
             head, tail, _ = e
             first = head
 
+            if encoding == 'chance':
+                if 'description' in edge:
+                    days = edge['count']
+                    s = 's' if days != 1 else ''
+                    G.nodes[head]['properties']['description'] = edge['description'].format(days=f'about {days}', s=s)
+                grow = {'__first__': head, '__last__': tail, 'element': 'newDay',
+                        'chance': round(100 / edge['count'], 2)}
+                for key in ('spawnItem', 'action'):
+                    if edge.get(key):
+                        grow[key] = edge[key]
+                to_add.append(grow)
+                continue
+
             if 'description' in edge:
                 days = edge['count']
                 s = 's' if days != 1 else ''
@@ -580,7 +608,8 @@ def graph_to_plants(G):
                 element = edge['element']
                 spawnItem = edge.get('spawnItem', None)
                 action = edge.get('action', None)
-                r = ItemReaction(element=element, newID=tail, spawnItem=spawnItem, action=action)
+                r = ItemReaction(element=element, newID=tail, spawnItem=spawnItem, action=action,
+                                 chance=edge.get('chance', None))
                 reactions.append(r)
         props = G.nodes[node].get('properties', {})
         if 'reactions' in props:
@@ -604,12 +633,12 @@ def define_loot():
              cloneFrom='loot0',
              toMake='loot_crops')
 
-def define_plants():
+def define_plants(encoding='chain'):
     with collect_records() as c:
         crops = [
-            define_turnip(),
-            define_wheat(),
-            define_corn()
+            define_turnip(encoding),
+            define_wheat(encoding),
+            define_corn(encoding)
         ]
         define_ambush(crops)
         define_loot()
@@ -0,0 +1,242 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from boatlib.data import Action, GlobalTrigger, ItemType
+from boatlib.formula import Environment, compile_formula, formulas_from
+from . import plants
+
+ELEMENTS = ('newDay', 'water', 'dig', 'slash', 'fire')
+HARVEST_ELEMENTS = ('use', 'dig', 'slash')
+
+NO_ACTION = 0
+HARVEST = 1
+RESET = 2
+ACTIONS = {
+    'activate_crop_harvest_ambush': HARVEST,
+    'reset_crop_harvest_ambush': RESET,
+}
+
+# Seeds to plant, and the item that harvesting gives.
+CROPS = {
+    'turnip': ('turnip_seeds', 'turnip'),
+    'wheat': ('wheat_seeds', 'cargo_grain'),
+    'corn': ('corn_seeds', 'corn'),
+}
+
+
+def _id(value):
+    return value.id if hasattr(value, 'id') else value
+
+def _list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def item_reactions(collection):
+    # Each item's reactions in the order the game checks them: its own, then any it
+    # clones from the item it's based on.
+    items = {item.id: item for item in collection.walk() if isinstance(item, ItemType)}
+
+    resolved = {}
+    def resolve(item_id):
+        if item_id in resolved:
+            return resolved[item_id]
+        item = items[item_id]
+        reactions = []
+        for reaction in item.subtypes:
+            p = reaction.properties
+            action = ACTIONS.get(_id(p.get('action')), NO_ACTION)
+            chance = p.get('chance')
+            chance = 1.0 if chance is None else chance / 100
+            for element in _list(p.get('element')):
+                reactions.append((element, _id(p['newID']), chance, action))
+        resolved[item_id] = reactions
+
+        parent = _id(item.properties.get('cloneFrom'))
+        special = _list(item.properties.get('special'))
+        if parent in items and parent != item_id and 'dontCloneReactions' not in special:
+            reactions.extend(resolve(parent))
+        return reactions
+
+    return {item_id: resolve(item_id) for item_id in items}
+
+
+class TransitionTable:
+    # For each element, the reactions of every state as arrays: targets[element][state, i]
+    # is where the i-th reaction leads (-1 if there isn't one), with its chance and action.
+    def __init__(self, reactions, elements=ELEMENTS + HARVEST_ELEMENTS):
+        states = set(reactions)
+        for item_reactions in reactions.values():
+            states.update(target for _, target, _, _ in item_reactions)
+        self.states = sorted(states)
+        self.index = {state: i for i, state in enumerate(self.states)}
+
+        self.targets = {}
+        self.chances = {}
+        self.actions = {}
+        for element in set(elements):
+            rows = [[r for r in reactions.get(state, []) if r[0] == element] for state in self.states]
+            width = max(len(row) for row in rows)
+            targets = np.full((len(rows), width), -1, dtype=np.int32)
+            chances = np.zeros((len(rows), width), dtype=np.float64)
+            actions = np.zeros((len(rows), width), dtype=np.int8)
+            for i, row in enumerate(rows):
+                for j, (_, target, chance, action) in enumerate(row):
+                    targets[i, j] = self.index[target]
+                    chances[i, j] = chance
+                    actions[i, j] = action
+            self.targets[element] = targets
+            self.chances[element] = chances
+            self.actions[element] = actions
+
+        # The states a player would harvest: the ones that roll for an ambush.
+        self.harvestable = np.zeros(len(self.states), dtype=bool)
+        for element in HARVEST_ELEMENTS:
+            self.harvestable |= (self.actions[element] == HARVEST).any(axis=1)
+
+    @classmethod
+    def from_collection(cls, collection):
+        return cls(item_reactions(collection))
+
+    def reacts(self, element, state):
+        return self.targets[element][state, 0] >= 0 if self.targets[element].shape[1] else np.zeros(state.shape, bool)
+
+    def apply(self, element, state, rng):
+        # The first reaction that passes its chance roll wins.
+        targets = self.targets[element]
+        new = state.copy()
+        fired = np.zeros(state.shape, dtype=np.int8)
+        done = np.zeros(state.shape, dtype=bool)
+        for i in range(targets.shape[1]):
+            target = targets[state, i]
+            chance = self.chances[element][state, i]
+            hit = ~done & (target >= 0) & (rng.random(state.shape) < chance)
+            new[hit] = target[hit]
+            fired[hit] = self.actions[element][state[hit], i]
+            done |= hit
+        return new, fired
+
+
+class Ambush:
+    # The summon chances in activate_crop_harvest_ambush, and the global vars its
+    # triggers set before them (which monster to roll for), as compiled formulas.
+    def __init__(self, collection):
+        records = list(collection.walk())
+        self.formulas = formulas_from(records)
+        self.setup = []
+        self.summons = []
+        for record in records:
+            if not (isinstance(record, Action) and record.id == 'activate_crop_harvest_ambush'):
+                continue
+            for affecter in record.av_affecters:
+                p = affecter.properties
+                if p['actorValue'] == 'summonActor':
+                    self.summons.append(compile_formula(p['chance']))
+                elif not self.summons and isinstance(p.get('magnitude'), GlobalTrigger):
+                    for effect in p['magnitude'].subtypes:
+                        e = effect.properties
+                        if e['effectID'] == 'setGlobalVar_math':
+                            self.setup.append((e['sValue'], compile_formula(e['sValue2'])))
+
+    def roll(self, armed, zone_items, rng):
+        # Whether each field's harvest summons any monsters.
+        env = Environment(globals={'crop_harvest_ambush': np.where(armed, 0, 1)},
+                          zone_items=zone_items, formulas=self.formulas, rng=rng, size=len(armed))
+        for name, formula in self.setup:
+            env.globals[name] = formula(env)
+        spawned = np.zeros(len(armed), dtype=bool)
+        for chance in self.summons:
+            spawned |= rng.random(len(armed)) < np.asarray(chance(env)) / 100
+        return spawned
+
+def simulate(table, ambush, seeds, fields=1000, plants_per_field=9, days=60, water=1.0, events=None, seed=None):
+    # Each field is its own game. Every day some plants get watered, random events hit
+    # others, everything ready is harvested and replanted, and then the day passes.
+    if events is None:
+        events = {}
+    rng = np.random.default_rng(seed)
+    shape = (fields, plants_per_field)
+    state = np.full(shape, table.index[seeds], dtype=np.int32)
+    planted = np.zeros(shape, dtype=np.int32)
+    armed = np.ones(fields, dtype=bool)
+
+    stats = {
+        'waterings': 0,
+        'harvests': np.zeros(fields, dtype=np.int64),
+        'growth_days': 0,
+        'ambushes': np.zeros(fields, dtype=np.int64),
+        'ambush_rolls': 0,
+    }
+    for day in range(days):
+        for element, chance in events.items():
+            hit = rng.random(shape) < chance
+            state[hit] = table.apply(element, state[hit], rng)[0]
+
+        watered = table.reacts('water', state) & (rng.random(shape) < water)
+        state[watered] = table.apply('water', state[watered], rng)[0]
+        stats['waterings'] += int(watered.sum())
+
+        harvest = table.harvestable[state]
+        harvested = harvest.sum(axis=1)
+        if harvested.any():
+            # Only the first harvest after the ambush is armed can start one. The crops
+            # still standing in the field count towards the chance.
+            rolls = armed & (harvested > 0)
+            zone_items = {table.states[i]: (state == i).sum(axis=1) for i in np.unique(state[harvest])}
+            stats['ambushes'] += rolls & ambush.roll(armed, zone_items, rng)
+            stats['ambush_rolls'] += int(rolls.sum())
+            armed &= ~rolls
+
+            stats['harvests'] += harvested
+            stats['growth_days'] += int((day - planted[harvest]).sum())
+            state[harvest] = table.index[seeds]
+            planted[harvest] = day
+
+        state, fired = table.apply('newDay', state, rng)
+        armed |= (fired == RESET).any(axis=1)
+
+    return stats
+
+def report(stats, fields, plants_per_field, days):
+    harvests = int(stats['harvests'].sum())
+    ambushes = int(stats['ambushes'].sum())
+    lines = [
+        f'plant-days:          {fields * plants_per_field * days}',
+        f'harvests per plant:  {harvests / (fields * plants_per_field):.2f}',
+        f'days to harvest:     {stats["growth_days"] / max(harvests, 1):.2f}',
+        f'waterings/harvest:   {stats["waterings"] / max(harvests, 1):.2f}',
+        f'ambushes per field:  {ambushes / fields:.3f}',
+        f'ambushes per roll:   {ambushes / max(stats["ambush_rolls"], 1):.3f}',
+    ]
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate crops growing from the generated item reactions.')
+    parser.add_argument('crop', choices=sorted(CROPS))
+    parser.add_argument('--fields', type=int, default=10000)
+    parser.add_argument('--plants', type=int, default=9, help='Plants in each field')
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--water', type=float, default=1.0, help='Chance each plant that needs water gets it each day')
+    parser.add_argument('--slash', type=float, default=0.0, help='Daily chance of each plant being slashed by accident')
+    parser.add_argument('--fire', type=float, default=0.0, help='Daily chance of each plant catching fire')
+    parser.add_argument('--growth', choices=plants.GROWTH_ENCODINGS, default='chain')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    collection = plants.define_plants(args.growth)
+    table = TransitionTable.from_collection(collection)
+    ambush = Ambush(collection)
+    events = {element: chance for element, chance in (('slash', args.slash), ('fire', args.fire)) if chance}
+
+    start = time.time()
+    seeds, _ = CROPS[args.crop]
+    stats = simulate(table, ambush, seeds, args.fields, args.plants, args.days, args.water, events, args.seed)
+    print(report(stats, args.fields, args.plants, args.days))
+    print(f'Simulated in {time.time() - start:.2f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
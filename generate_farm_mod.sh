@@ -5,5 +5,5 @@ mkdir -p rcfox_farming
 rm rcfox_farming.zip
 
 python -m farm_mod.main > rcfox_farming/rcfox_farming.txt
-cp farm_mod/*.png rcfox_farming
+python -m boatlib.pngopt rcfox_farming farm_mod/*.png
 zip -r rcfox_farming.zip rcfox_farming
@@ -1,21 +1,78 @@
+import argparse
+import collections
+
 from boatlib.data import (collect_records, DialogNode, DialogNodeOverride,
                           GlobalTrigger, GlobalTriggerEffect, DialogOption,
-                          Parser)
-
-
-def main():
-    materials = [('iron', 'iron_chunk'), ('wood', 'woodPlank'),
-                 ('steel', 'steel_bar'), ('bone', 'bones1'),
-                 ('mythril', 'mythril_chunk'), ('coral', 'coral'),
-                 ('corpryst', 'corpryst'), ('volskarn', 'volskarn_chunk'),
-                 ('leaf', 'aldleaf'), ('silk', 'silk_spide'),
-                 ('elec', 'shock_chunk'), ('laser', 'laser_chunk'),
-                 ('ironice', 'ironice_chunk'), ('wind', 'whistle_chunk'),
-                 ('fang', 'fang_spidest')]
-    items = [
-        'dagger', 'sword', 'hammer', 'axe', 'shield', 'flail', 'whip', 'bow',
-        'xbow', 'spear', 'knuckle', 'rapier', 'greatsword', 'armor'
-    ]
+                          load_records, natural_key, recipes_by_result)
+
+MATERIALS = [('iron', 'iron_chunk'), ('wood', 'woodPlank'),
+             ('steel', 'steel_bar'), ('bone', 'bones1'),
+             ('mythril', 'mythril_chunk'), ('coral', 'coral'),
+             ('corpryst', 'corpryst'), ('volskarn', 'volskarn_chunk'),
+             ('leaf', 'aldleaf'), ('silk', 'silk_spide'),
+             ('elec', 'shock_chunk'), ('laser', 'laser_chunk'),
+             ('ironice', 'ironice_chunk'), ('wind', 'whistle_chunk'),
+             ('fang', 'fang_spidest')]
+ITEMS = [
+    'dagger', 'sword', 'hammer', 'axe', 'shield', 'flail', 'whip', 'bow',
+    'xbow', 'spear', 'knuckle', 'rapier', 'greatsword', 'armor'
+]
+
+
+def default_materials():
+    # Without the game data, assume every kind of item comes in every material.
+    for material, ingredient in MATERIALS:
+        material_items = [f'{item}_{material}' for item in ITEMS]
+        material_items.append(f'xbow_{material}_unloaded')
+        yield material, ingredient, material_items
+
+def material_name(ingredient):
+    # Materials the game doesn't have a short name for are named after their ingredient,
+    # which is unique.
+    known = dict((ingredient, material) for material, ingredient in MATERIALS)
+    return known.get(ingredient, ingredient)
+
+def materials_from_data(records):
+    # Everything made by combining a crafting kit (craft_*) with a single ingredient
+    # can be recycled back into that ingredient.
+    ids = {record['ID'] for record in records
+           if record['__type__'].lower() == 'itemtype' and 'ID' in record}
+    by_ingredient = {}
+    for result, pairs in recipes_by_result(records).items():
+        if result not in ids:
+            continue
+        for a, b in pairs:
+            kits = [x for x in (a, b) if x.startswith('craft_')]
+            if len(kits) == 1:
+                ingredient = b if kits[0] == a else a
+                by_ingredient.setdefault(ingredient, set()).add(result)
+
+    # Known materials keep their usual place in the menu, new ones go after them.
+    order = [ingredient for _, ingredient in MATERIALS]
+    def menu_order(ingredient):
+        return (order.index(ingredient) if ingredient in order else len(order), ingredient)
+
+    used = set()
+    for ingredient in sorted(by_ingredient, key=menu_order):
+        material_items = sorted(by_ingredient[ingredient], key=natural_key)
+        # Loaded crossbows turn into the unloaded version, if there is one.
+        unloaded = [f'{item}_unloaded' for item in material_items]
+        material_items.extend(item for item in unloaded if item in ids and item not in material_items)
+        # Trigger IDs are built from the name, so no two ingredients can share one.
+        name = material_name(ingredient)
+        n = 1
+        while name in used:
+            n += 1
+            name = f'{material_name(ingredient)}{n}'
+        used.add(name)
+        yield name, ingredient, material_items
+
+
+def main(base_files=()):
+    if base_files:
+        materials = list(materials_from_data(load_records(*base_files)))
+    else:
+        materials = list(default_materials())
 
     with collect_records() as c:
         recycle_menu = DialogNode(
@@ -36,13 +93,18 @@ def main():
                      ID='sport_merchant_smithy',
                      bottomOption=True)
 
-        for material, ingredient in materials:
-            material_items = [f'{item}_{material}' for item in items]
-            material_items.append(f'xbow_{material}_unloaded')
+        # An item made from more than one ingredient gets a trigger for each of them.
+        ingredient_counts = collections.Counter(item for _, _, material_items in materials
+                                                for item in material_items)
+        def item_trigger(item, material):
+            if ingredient_counts[item] > 1:
+                return f'rcfox_recycle_{item}_{material}'
+            return f'rcfox_recycle_{item}'
 
+        for material, ingredient, material_items in materials:
             for item in material_items:
                 GlobalTrigger(
-                    f'rcfox_recycle_{item}',
+                    item_trigger(item, material),
                     [
                         GlobalTriggerEffect(
                             'removeItemFromParty', strings=[item], floats=[1]),
@@ -50,19 +112,19 @@ def main():
                             'giveItem', strings=[ingredient], floats=[1]),
                         GlobalTriggerEffect(
                             'trigger',
-                            strings=[f'rcfox_recycle_{item}'],
+                            strings=[item_trigger(item, material)],
                             # Adding a tiny delay prevents a stack overflow
                             delay=0.001)
                     ],
                     reqFormula=f'partyItem:{item}')
             material_trigger = GlobalTrigger(f'rcfox_recycle_all_{material}', [
                 GlobalTriggerEffect('trigger',
-                                    strings=[f'rcfox_recycle_{item}'])
+                                    strings=[item_trigger(item, material)])
                 for item in material_items
             ])
 
             recycle_menu.add_option(
-                material.title(),
+                material.replace('_', ' ').title(),
                 '',
                 specialEffect=[f'trigger,{material_trigger.id}'],
                 formulaReq=' + '.join(f'partyItem:{item}'
@@ -71,4 +133,8 @@ def main():
 
 
 if __name__ == '__main__':
-    print(main())
+    parser = argparse.ArgumentParser(description='Generate the equipment recycling mod.')
+    parser.add_argument('base', nargs='*',
+                        help='Base game ItemType files to find the craftable items in (default: a built in list)')
+    args = parser.parse_args()
+    print(main(args.base))
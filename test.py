@@ -1,5 +1,8 @@
 import sys
+import time
+import itertools
 from boatlib.map import Map, dist_sq
+from boatlib.nav import NavGraph
 
 img = 'Content/Data/ZoneData/eral.png'
 locations = 'Content/SystemSaves/defaultLocations.txt'
@@ -11,16 +14,37 @@ m = Map(img, locations, zones)
 #     for line in m.polygon_as_lines(polygon):
 #         m.draw_line(line)
 
+islands, max_error = m.simplified_islands(4, 2)
+print(f'{sum(len(polygon) for polygon in islands)} island vertices, max simplification error {max_error:.2f}')
+
 waypoints = set()
-for polygon in m.expand_islands(4):
+island_lines = []
+for polygon in islands:
     for line in m.polygon_as_lines(polygon):
         p1, p2 = line
         waypoints.add(p1)
         waypoints.add(p2)
-        m.draw_line(line, color=(255, 0, 255, 255), draw_points=True)
+        island_lines.append(line)
+m.draw_overlay(lines=island_lines, points=waypoints, color=(255, 0, 255, 255))
+
+waypoint_lines = list(m.get_waypoint_lines())
+m.draw_overlay(lines=waypoint_lines,
+               points=[p for line in waypoint_lines for p in line],
+               color=(255, 255, 0, 255))
+
+start = time.time()
+nav = NavGraph(islands)
+print(f'Built navigation graph with {len(nav.nodes)} nodes in {time.time() - start:.2f}s')
 
-for line in m.get_waypoint_lines():
-     m.draw_line(line, color=(255, 255, 0, 255), draw_points=True)
+start = time.time()
+ports = dict(m.get_port_points())
+routes = []
+for port1, port2 in itertools.combinations(ports, 2):
+    route = nav.route(ports[port1], ports[port2])
+    if route:
+        routes.extend(zip(route, route[1:]))
+print(f'Found routes between {len(ports)} ports in {time.time() - start:.2f}s')
+m.draw_overlay(lines=routes, color=(0, 255, 0, 255))
 
 m.scale(2, 2)
 m.show()
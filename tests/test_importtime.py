@@ -0,0 +1,18 @@
+from boatlib.importtime import DEFAULT_BUDGET_MS, import_times, wall_time
+
+# Imports that are deferred until something actually needs them.
+DEFERRED = {'uuid', 'concurrent.futures', 'networkx'}
+
+
+def imported(module, args=()):
+    return {name for name, _, _, _ in import_times(module, args)}
+
+def test_dummy_skips_deferred_imports():
+    assert not imported('dummy') & DEFERRED
+
+def test_farm_mod_help_skips_networkx():
+    # Only defining the crops needs networkx.
+    assert 'networkx' not in imported('farm_mod.main', ['--help'])
+
+def test_dummy_within_budget():
+    assert wall_time('dummy', runs=3) < DEFAULT_BUDGET_MS
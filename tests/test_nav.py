@@ -0,0 +1,42 @@
+from boatlib.geometry import distance
+from boatlib.nav import NavGraph
+
+SQUARE = [(0, 0), (20, 0), (20, 20), (0, 20)]
+# An island with a bay opening to the right.
+BAY = [(0, 0), (100, 0), (100, 20), (30, 20), (30, 80), (100, 80), (100, 100), (0, 100)]
+
+
+def length(path):
+    return sum(distance(a, b) for a, b in zip(path, path[1:]))
+
+def test_line_through_corners_is_blocked():
+    # A diagonal through two opposite corners doesn't cross any edges, but still goes
+    # through the square.
+    nav = NavGraph([SQUARE])
+    assert not nav.visible((-10, -10), (30, 30))
+    assert nav.route((-30, -30), (70, 70)) in ([(-30, -30), (20, 0), (70, 70)],
+                                               [(-30, -30), (0, 20), (70, 70)])
+
+def test_line_along_edge_is_visible():
+    nav = NavGraph([SQUARE])
+    assert nav.visible((-10, 0), (30, 0))
+
+def test_port_exits_into_nearest_water():
+    # The port is just inside the clearance area at the back of the bay, so it should
+    # head straight out rather than around the island.
+    nav = NavGraph([BAY])
+    path = nav.route((28, 50), (60, 50))
+    assert path[0] == (28, 50) and path[-1] == (60, 50)
+    assert length(path) < 33
+
+def test_ports_inside_two_islands_see_each_other():
+    nav = NavGraph([SQUARE, [(60, 0), (80, 0), (80, 20), (60, 20)]])
+    path = nav.route((19, 10), (61, 10))
+    assert length(path) < 43
+
+def test_route_from_corner():
+    nav = NavGraph([SQUARE, [(40, -30), (60, -30), (60, 50), (40, 50)]])
+    path = nav.route((20, 20), (100, 10))
+    assert path[0] == (20, 20) and path[-1] == (100, 10)
+    assert abs(length(path) - (distance((20, 20), (40, 50)) + distance((40, 50), (60, 50))
+                               + distance((60, 50), (100, 10)))) < 1e-9